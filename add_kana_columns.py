@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+business_cards・coworkersテーブルに読み（カナ）カラムを追加するマイグレーションスクリプト
+"""
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+COLUMNS = {
+    "business_cards": ["name_kana", "company_kana"],
+    "coworkers": ["name_kana"],
+}
+
+def add_kana_columns():
+    """読みカラムを追加（既にあればスキップ）"""
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    
+    engine = create_engine(database_url)
+    
+    with engine.begin() as conn:
+        print("=== 読みカラムの追加 ===")
+        
+        for table, columns in COLUMNS.items():
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} VARCHAR(255)"))
+                print(f"✅ {table}.{column}")
+
+if __name__ == "__main__":
+    try:
+        add_kana_columns()
+    except Exception as e:
+        print(f"エラー: {e}")
+        import traceback
+        traceback.print_exc()
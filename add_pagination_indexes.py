@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+contactsテーブルにキーセットページング用の複合インデックスを追加するマイグレーションスクリプト
+"""
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+INDEXES = {
+    "ix_contacts_coworker_status_date_id": "contacts (coworker_id, status, contact_date, id)",
+    "ix_contacts_department_status_date_id": "contacts (department_id, status, contact_date, id)",
+}
+
+def add_pagination_indexes():
+    """キーセットページング用の複合インデックスを追加"""
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    
+    engine = create_engine(database_url)
+    
+    # CREATE INDEX CONCURRENTLY はトランザクション外で実行する必要がある
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("=== キーセットページング用インデックスの追加 ===")
+        
+        for name, definition in INDEXES.items():
+            try:
+                conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+                print(f"✅ {name}")
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+
+if __name__ == "__main__":
+    try:
+        add_pagination_indexes()
+    except Exception as e:
+        print(f"エラー: {e}")
+        import traceback
+        traceback.print_exc()
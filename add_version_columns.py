@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+contacts・business_cards・coworkersテーブルに行バージョン（version / updated_at）カラムを追加するマイグレーションスクリプト
+"""
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+TABLES = ["contacts", "business_cards", "coworkers"]
+
+def add_version_columns():
+    """version / updated_at カラムを追加（既にあればスキップ）"""
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    
+    engine = create_engine(database_url)
+    
+    with engine.begin() as conn:
+        print("=== 行バージョンカラムの追加 ===")
+        
+        for table in TABLES:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"))
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now()"))
+            print(f"✅ {table}.version / {table}.updated_at")
+        
+        # 既存の面談記録は作成日時を最終更新日時とみなす
+        result = conn.execute(text("""
+            UPDATE contacts SET updated_at = created_at
+            WHERE version = 1 AND created_at IS NOT NULL
+        """))
+        print(f"✅ {result.rowcount}件の面談記録の updated_at を created_at で初期化しました")
+
+if __name__ == "__main__":
+    try:
+        add_version_columns()
+    except Exception as e:
+        print(f"エラー: {e}")
+        import traceback
+        traceback.print_exc()
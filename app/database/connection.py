@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -8,7 +9,19 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Supabase用の接続設定
+def to_async_url(url: str) -> str:
+    """同期用の接続URLを非同期ドライバ(asyncpg)用に変換"""
+    if not url:
+        return url
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Supabase用の接続設定（同期：メンテナンススクリプト用）
 engine = create_engine(
     DATABASE_URL,
     pool_size=5,
@@ -24,12 +37,31 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Supabase用の接続設定（非同期：APIルーター用）
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    connect_args={
+        "ssl": "require",
+        "timeout": 10,
+        "server_settings": {"application_name": "meeting_app"}
+    }
+)
+
+# コミット後も属性を参照できるように expire_on_commit=False
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
-def get_db():
-    """依存関係注入用のデータベースセッション"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """依存関係注入用のデータベースセッション（非同期）"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
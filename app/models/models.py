@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Date, ForeignKey, Table, Index, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, query_expression
 from datetime import datetime
 from app.database.connection import Base
 
@@ -25,10 +26,15 @@ class BusinessCard(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
+    name_kana = Column(String(255))  # 読み（候補表示の前方一致用）
     company = Column(String(255), nullable=False, index=True)
+    company_kana = Column(String(255))
     department = Column(String(255))
     position = Column(String(255))
     memo = Column(Text)
+    # 行のバージョン（条件付きGETのETag用、更新のたびに+1。COPYでも入るようDB側にも既定値を持つ）
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow)
     
     # リレーション
     contacts = relationship("Contact", secondary=contact_person_table, back_populates="persons")
@@ -39,10 +45,14 @@ class Coworker(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
+    name_kana = Column(String(255))  # 読み（候補表示の前方一致用）
     position = Column(String(255))
     email = Column(String(255), nullable=False, unique=True)
     sso_id = Column(String(255), unique=True)
     department_id = Column(Integer, index=True)
+    # 行のバージョン（面談記録の詳細のETagに作成者・同席者の変更も反映するため、更新のたびに+1）
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow)
     
     # リレーション
     auth_user = relationship("AuthUser", back_populates="coworker", uselist=False)
@@ -61,9 +71,35 @@ class AuthUser(Base):
     # リレーション
     coworker = relationship("Coworker", back_populates="auth_user")
 
+class RefreshToken(Base):
+    """リフレッシュトークン（トークン本体は保存せずハッシュのみ、ローテーションの系列を family_id でたどる）"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)  # sha256 hex
+    family_id = Column(String(32), nullable=False, index=True)  # ログイン1回ごとの系列
+    coworker_id = Column(Integer, ForeignKey("coworkers.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime)  # ローテーション済み（再利用されたら系列ごと失効）
+    revoked_at = Column(DateTime)
+
+class RevokedAccessToken(Base):
+    """ログアウトで失効させたアクセストークン（全ワーカー・インスタンスで失効を共有するため、exp まで保持）"""
+    __tablename__ = "revoked_access_tokens"
+    
+    token_digest = Column(String(64), primary_key=True)  # sha256 hex（トークン本体は保存しない）
+    expires_at = Column(Float, nullable=False, index=True)  # トークンの exp（UNIX時刻、秒）
+    revoked_at = Column(Float, nullable=False, index=True)  # UNIX時刻（秒）
+
 class Contact(Base):
     """面談記録テーブル（メイン）"""
     __tablename__ = "contacts"
+    __table_args__ = (
+        # キーセットページング用（下書き・履歴は作成者単位、検索は部署単位）
+        Index("ix_contacts_coworker_status_date_id", "coworker_id", "status", "contact_date", "id"),
+        Index("ix_contacts_department_status_date_id", "department_id", "status", "contact_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     contact_date = Column(Date)
@@ -76,8 +112,57 @@ class Contact(Base):
     status = Column(Integer, nullable=False, default=0, index=True)  # 1:保存完了、0:一時保存、9:破棄
     department_id = Column(Integer, index=True)
     coworker_id = Column(Integer, ForeignKey("coworkers.id"), index=True)
+    # 行のバージョン（条件付きGETのETag用、Core の update() も含め更新のたびに+1）
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow)
+    
+    # 一覧用の要約抜粋（with_expressionで指定したときのみロード）
+    summary_excerpt = query_expression()
     
     # リレーション
     coworker = relationship("Coworker", back_populates="created_contacts")
     persons = relationship("BusinessCard", secondary=contact_person_table, back_populates="contacts")
-    companions = relationship("Coworker", secondary=contact_companions_table, back_populates="attended_contacts")
\ No newline at end of file
+    companions = relationship("Coworker", secondary=contact_companions_table, back_populates="attended_contacts")
+
+class ContactSearchGram(Base):
+    """面談記録の全文検索用 n-gram 転置インデックス（汎用／SQLite用バックエンド）"""
+    __tablename__ = "contact_search_grams"
+    
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True)
+    field = Column(String(16), primary_key=True)  # title / person / summary / details など
+    gram = Column(String(8), primary_key=True)
+    tf = Column(Integer, nullable=False, default=1)  # フィールド内の出現回数
+    
+    __table_args__ = (
+        Index("ix_contact_search_grams_gram", "gram", "contact_id"),
+    )
+
+class ContactSearchVector(Base):
+    """面談記録の全文検索用 tsvector（PostgreSQL用バックエンド、bi-gramを語彙として格納）"""
+    __tablename__ = "contact_search_vectors"
+    
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True)
+    vector = Column(TSVECTOR().with_variant(Text(), "sqlite"))
+    
+    __table_args__ = (
+        Index("ix_contact_search_vectors_vector", "vector", postgresql_using="gin"),
+    )
+
+class LoginThrottleBucket(Base):
+    """ログイン試行制限のトークンバケット（複数ワーカー・インスタンスで共有する場合の保存先）"""
+    __tablename__ = "login_throttle_buckets"
+    
+    key = Column(String(128), primary_key=True)  # user:<id> / ip:<address>
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False, index=True)  # UNIX時刻（秒）
+    granted = Column(Integer, nullable=False, default=1)  # 直近の take() で消費できたか
+
+class SummaryCacheEntry(Base):
+    """要約結果のキャッシュ（入力テキスト・モデル・プロンプト版・パラメータのハッシュをキーとする）"""
+    __tablename__ = "summary_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 hex
+    model = Column(String(64), nullable=False)
+    prompt_version = Column(String(16), nullable=False)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
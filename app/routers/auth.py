@@ -1,52 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.database.connection import get_db
 from app.models.models import AuthUser, Coworker
-from app.schemas.schemas import LoginRequest, LoginResponse
-from app.utils.auth import verify_password, create_access_token
-from datetime import datetime, timedelta
+from app.schemas.schemas import LoginRequest, LoginResponse, RefreshRequest, TokenResponse
+from app.services import refresh_token_service
+from app.services.refresh_token_service import RefreshTokenError
+from app.services.last_login_buffer import last_login_buffer
+from app.utils.auth import create_access_token, revoke_token, needs_rehash, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.utils.password_pool import password_pool, PasswordPoolBusyError
+from app.utils.login_throttle import login_throttle, client_ip
+from datetime import timedelta
+from typing import Optional
 
 router = APIRouter()
 
+optional_security = HTTPBearer(auto_error=False)
+
+def _access_token(coworker_id: int) -> str:
+    return create_access_token(
+        data={"sub": str(coworker_id)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+async def _rehash_password(db: AsyncSession, auth_user: AuthUser, password: str):
+    """目標コストで再ハッシュして保存（同時ログインで既に更新済みなら上書きしない、混雑時は見送り）"""
+    try:
+        new_hash = await password_pool.hash(password)
+    except PasswordPoolBusyError:
+        return
+    await db.execute(
+        update(AuthUser).where(
+            AuthUser.id == auth_user.id,
+            AuthUser.password_hash == auth_user.password_hash
+        ).values(password_hash=new_hash).execution_options(synchronize_session=False)
+    )
+
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """ログイン処理"""
+    # 試行回数の制限（bcryptによるCPU消費を抑えるため、DB参照・パスワード検証より前に判定）
+    ip = client_ip(request)
+    retry_after = await login_throttle.check(login_data.user_id, ip)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="ログインの試行回数が多すぎます。しばらく待ってから再度お試しください",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
     # ユーザーの検索（coworker_idで検索）
-    auth_user = db.query(AuthUser).join(Coworker).filter(
-        Coworker.id == login_data.user_id
-    ).first()
+    result = await db.execute(
+        select(AuthUser).join(Coworker).options(
+            joinedload(AuthUser.coworker)
+        ).filter(Coworker.id == login_data.user_id)
+    )
+    auth_user = result.scalars().first()
     
     if not auth_user:
+        await login_throttle.record_failure(ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ログインできませんでした"
         )
     
-    # パスワード検証
-    if not verify_password(login_data.password, auth_user.password_hash):
+    # パスワード検証（bcryptはイベントループ外の専用プールで実行）
+    try:
+        is_valid = await password_pool.verify(login_data.password, auth_user.password_hash)
+    except PasswordPoolBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ログインが混み合っています。しばらく待ってから再度お試しください",
+            headers={"Retry-After": "1"}
+        )
+    
+    if not is_valid:
+        await login_throttle.record_failure(ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ログインできませんでした"
         )
     
-    # 最終ログイン日時の更新
-    auth_user.last_login = datetime.utcnow()
-    db.commit()
+    # コストが目標と異なるハッシュは、平文が手元にあるこの機会に再ハッシュ
+    if needs_rehash(auth_user.password_hash):
+        await _rehash_password(db, auth_user, login_data.password)
     
-    # JWTトークンの作成
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": str(auth_user.coworker.id)}, 
-        expires_delta=access_token_expires
-    )
+    # 最終ログイン日時はバッファに記録して後でまとめて書き込む
+    last_login_buffer.record(auth_user.id)
+    
+    # リフレッシュトークンの発行
+    refresh_token = await refresh_token_service.issue(db, auth_user.coworker.id)
+    await db.commit()
     
     return LoginResponse(
-        access_token=access_token,
+        access_token=_access_token(auth_user.coworker.id),
+        token_type="bearer",
+        user=auth_user.coworker,
+        refresh_token=refresh_token
+    )
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(refresh_data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """リフレッシュトークンでアクセストークンを再発行（パスワード検証なし、トークンはローテーション）"""
+    try:
+        coworker_id, refresh_token = await refresh_token_service.rotate(db, refresh_data.refresh_token)
+    except RefreshTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なリフレッシュトークンです。再度ログインしてください"
+        )
+    
+    return TokenResponse(
+        access_token=_access_token(coworker_id),
         token_type="bearer",
-        user=auth_user.coworker
+        refresh_token=refresh_token
     )
 
 @router.post("/logout")
-async def logout():
-    """ログアウト処理"""
-    return {"message": "ログアウトしました"}
\ No newline at end of file
+async def logout(
+    refresh_data: Optional[RefreshRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_db)
+):
+    """ログアウト処理（リフレッシュトークンの系列とアクセストークンを失効）"""
+    if refresh_data is not None:
+        await refresh_token_service.revoke(db, refresh_data.refresh_token)
+    if credentials is not None:
+        await revoke_token(db, credentials.credentials)
+    return {"message": "ログアウトしました"}
@@ -1,43 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
 from typing import List
 from app.database.connection import get_db
+from app.utils.pagination import id_cursor_filter, next_id_cursor, fetch_page, total_pages
+from app.utils.batch_lookup import parse_ids, order_by_ids
+from app.utils.http_cache import version_etag, is_not_modified, not_modified_response, validator_headers
+from app.services.suggest_index import business_card_index
+from app.services.business_card_import import import_business_cards, ImportFormatError
 from app.models.models import BusinessCard
-from app.schemas.schemas import BusinessCard as BusinessCardSchema, BusinessCardCreate, SearchRequest, SearchResponse
+from app.schemas.schemas import BusinessCard as BusinessCardSchema, BusinessCardCreate, BusinessCardBatchResponse, BusinessCardImportResponse, SearchRequest, SearchResponse
 
 router = APIRouter()
 
+# orjsonで直接返す一覧・一括取得の列（レスポンスのスキーマと同じ項目だけを読み、テーブルに列が増えても漏らさない）
+BUSINESS_CARD_COLUMNS = [BusinessCard.__table__.c[name] for name in BusinessCardSchema.model_fields]
+
 @router.post("/", response_model=BusinessCardSchema)
-async def create_business_card(card_data: BusinessCardCreate, db: Session = Depends(get_db)):
+async def create_business_card(card_data: BusinessCardCreate, db: AsyncSession = Depends(get_db)):
     """名刺情報の作成"""
     card = BusinessCard(**card_data.dict())
     db.add(card)
-    db.commit()
-    db.refresh(card)
+    await db.commit()
+    await db.refresh(card)
+    business_card_index.add(card)
     return card
 
-@router.get("/", response_model=List[BusinessCardSchema])
-async def get_business_cards(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """名刺一覧の取得"""
-    cards = db.query(BusinessCard).offset(skip).limit(limit).all()
-    return cards
+@router.post("/import", response_model=BusinessCardImportResponse)
+async def import_business_card_file(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+    """名刺の一括取り込み（CSV / XLSX、重複はスキップし行ごとのエラーを返す）"""
+    data = await file.read()
+    try:
+        report = await import_business_cards(db, data, file.filename)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        business_card_index.invalidate()
+    return report
+
+@router.get("/", response_model=List[BusinessCardSchema], response_class=ORJSONResponse)
+async def get_business_cards(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    """名刺一覧の取得（ORMオブジェクト・スキーマ検証を経ず、スキーマと同じ列をCoreで読んでorjsonで返す）"""
+    result = await db.execute(
+        select(*BUSINESS_CARD_COLUMNS).order_by(BusinessCard.id).offset(skip).limit(limit)
+    )
+    return ORJSONResponse([dict(row._mapping) for row in result])
 
 @router.post("/search", response_model=SearchResponse)
-async def search_business_cards(search_data: SearchRequest, db: Session = Depends(get_db)):
+async def search_business_cards(search_data: SearchRequest, db: AsyncSession = Depends(get_db)):
     """外部担当者の検索"""
-    offset = (search_data.page - 1) * search_data.per_page
-    
     # 名前または会社名で部分一致検索
-    query = db.query(BusinessCard).filter(
+    query = select(BusinessCard).filter(
         or_(
             BusinessCard.name.ilike(f"%{search_data.keyword}%"),
             BusinessCard.company.ilike(f"%{search_data.keyword}%")
         )
     )
     
-    total = query.count()
-    cards = query.offset(offset).limit(search_data.per_page).all()
+    # 件数は total_mode に応じて同じSQL文の中で数える（または数えない）
+    cursor_filter = id_cursor_filter(BusinessCard.id, search_data.cursor) if search_data.cursor else None
+    page_result = await fetch_page(
+        db, query, [BusinessCard.id], search_data.page, search_data.per_page,
+        cursor_filter=cursor_filter, total_mode=search_data.total_mode
+    )
+    cards = page_result.items
     
     items = []
     for card in cards:
@@ -51,16 +78,46 @@ async def search_business_cards(search_data: SearchRequest, db: Session = Depend
     
     return SearchResponse(
         items=items,
-        total=total,
+        total=page_result.total,
         page=search_data.page,
         per_page=search_data.per_page,
-        total_pages=(total + search_data.per_page - 1) // search_data.per_page
+        total_pages=total_pages(page_result.total, search_data.per_page),
+        next_cursor=next_id_cursor(cards, search_data.per_page) if page_result.has_more else None,
+        has_more=page_result.has_more,
+        total_mode=search_data.total_mode
     )
 
+@router.get("/suggest", response_model=List[BusinessCardSchema])
+async def suggest_business_cards(q: str = "", limit: int = Query(10, ge=1, le=50), db: AsyncSession = Depends(get_db)):
+    """入力中の文字列に前方一致する名刺の候補（名前・会社名とその読み、メモリ内インデックスで応答）"""
+    await business_card_index.ensure_loaded(db)
+    return business_card_index.search(q, limit)
+
+@router.get("/batch", response_model=BusinessCardBatchResponse, response_class=ORJSONResponse)
+async def get_business_cards_batch(ids: str, db: AsyncSession = Depends(get_db)):
+    """複数の名刺を1回のIN句で取得（ids=3,1,2 の指定順で返し、見つからないidは missing_ids に入れる）"""
+    id_list = parse_ids(ids)
+    result = await db.execute(select(*BUSINESS_CARD_COLUMNS).where(BusinessCard.id.in_(id_list)))
+    rows, missing_ids = order_by_ids(id_list, result)
+    return ORJSONResponse({"items": [dict(row._mapping) for row in rows], "missing_ids": missing_ids})
+
 @router.get("/{card_id}", response_model=BusinessCardSchema)
-async def get_business_card(card_id: int, db: Session = Depends(get_db)):
-    """名刺情報の詳細取得"""
-    card = db.query(BusinessCard).filter(BusinessCard.id == card_id).first()
+async def get_business_card(card_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """名刺情報の詳細取得（ETag / Last-Modified 付き、条件付きGETで変更がなければ304）"""
+    if request.headers.get("if-none-match") or request.headers.get("if-modified-since"):
+        # バージョンだけを読んで判定
+        result = await db.execute(
+            select(BusinessCard.version, BusinessCard.updated_at).where(BusinessCard.id == card_id)
+        )
+        row = result.first()
+        if not row:
+            raise HTTPException(status_code=404, detail="名刺が見つかりません")
+        etag = version_etag("card", card_id, row.version)
+        if is_not_modified(request, etag, row.updated_at):
+            return not_modified_response(etag, row.updated_at)
+    
+    card = await db.get(BusinessCard, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="名刺が見つかりません")
+    response.headers.update(validator_headers(version_etag("card", card.id, card.version), card.updated_at))
     return card
\ No newline at end of file
@@ -1,192 +1,569 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import select, insert, update, delete, and_, or_, func
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from app.database.connection import get_db
-from app.models.models import Contact, BusinessCard, Coworker
-from sqlalchemy.orm import joinedload
-from app.schemas.schemas import Contact as ContactSchema, ContactCreate, ContactUpdate, SearchRequest, SearchResponse, SummaryRequest, SummaryResponse
-from app.services.openai_service import summarize_meeting_content
+from app.models.models import Contact, BusinessCard, Coworker, contact_person_table, contact_companions_table
+from sqlalchemy.orm import joinedload, selectinload, load_only, with_expression
+from app.schemas.schemas import Contact as ContactSchema, ContactListItem, ContactCreate, ContactBatchResponse, ContactBulkRequest, ContactBulkResult, ContactBulkResponse, ContactUpdate, SearchRequest, SearchResponse, SummaryRequest, SummaryResponse, TotalMode, MAX_PER_PAGE
+from app.services.openai_service import summarize_meeting_content, stream_meeting_summary, describe_error, EmptySummaryError, SUMMARY_MAX_INPUT_CHARS
+from app.services import search_service
 from app.utils.dependencies import get_current_user
-from datetime import datetime
+from app.utils.principal_cache import Principal
+from app.utils.batch_lookup import parse_ids, order_by_ids
+from app.utils.http_cache import version_etag, is_not_modified, not_modified_response, validator_headers
+from app.utils.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, HAS_MORE_HEADER, Page, fetch_page, date_id_cursor_filter, next_date_id_cursor, score_id_cursor_filter, next_score_id_cursor
+from datetime import date, datetime
+import csv
+import io
+import json
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.post("/", response_model=ContactSchema)
-async def create_contact(contact_data: ContactCreate, current_user: Coworker = Depends(get_current_user), db: Session = Depends(get_db)):
-    """新規面談記録の作成"""
-    # 面談記録の作成
-    contact = Contact(
-        contact_date=contact_data.contact_date,
-        location=contact_data.location,
-        title=contact_data.title,
-        summary_text=contact_data.summary_text,
-        raw_text=contact_data.raw_text,
-        details=contact_data.details,
-        status=contact_data.status,
-        department_id=current_user.department_id,
-        coworker_id=current_user.id
+# 一覧で返す項目（fields未指定時は全て）
+LIST_FIELDS = ("id", "title", "contact_date", "location", "status", "coworker_name", "person_names", "summary_excerpt")
+LIST_COLUMNS = {
+    "title": Contact.title,
+    "contact_date": Contact.contact_date,
+    "location": Contact.location,
+    "status": Contact.status,
+}
+SUMMARY_EXCERPT_LENGTH = 80
+
+# 一括登録の上限件数と1トランザクションあたりの件数
+BULK_MAX_ITEMS = 10000
+BULK_CHUNK_SIZE = 1000
+
+# エクスポート形式とサーバーサイドカーソルの取得件数
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_BATCH_SIZE = 500
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    """fields=title,contact_date のような指定を解釈（idは常に含める）"""
+    if not fields:
+        return list(LIST_FIELDS)
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"指定できない項目です: {', '.join(unknown)}")
+    return ["id"] + [name for name in LIST_FIELDS if name in selected and name != "id"]
+
+def _list_options(selected: List[str]) -> list:
+    """一覧に必要な列とリレーションだけをロードするオプション（本文の列は読まない）"""
+    # ページングのカーソルに使う contact_date は常にロード
+    columns = {Contact.contact_date} | {LIST_COLUMNS[name] for name in selected if name in LIST_COLUMNS}
+    options = [load_only(*columns)]
+    if "coworker_name" in selected:
+        options.append(joinedload(Contact.coworker).load_only(Coworker.name))
+    if "person_names" in selected:
+        options.append(selectinload(Contact.persons).load_only(BusinessCard.name))
+    if "summary_excerpt" in selected:
+        options.append(with_expression(
+            Contact.summary_excerpt, func.substr(Contact.summary_text, 1, SUMMARY_EXCERPT_LENGTH)
+        ))
+    return options
+
+def _to_list_item(contact: Contact, selected: List[str]) -> ContactListItem:
+    """ロード済みの属性だけから一覧用スキーマを組み立て"""
+    values = {"id": contact.id}
+    for name in selected:
+        if name in LIST_COLUMNS:
+            values[name] = getattr(contact, name)
+    if "coworker_name" in selected:
+        values["coworker_name"] = contact.coworker.name if contact.coworker else None
+    if "person_names" in selected:
+        values["person_names"] = [person.name for person in contact.persons]
+    if "summary_excerpt" in selected:
+        values["summary_excerpt"] = contact.summary_excerpt
+    return ContactListItem(**values)
+
+async def _fetch_contacts(db: AsyncSession, query, page: int, per_page: int, cursor: Optional[str], total_mode: str) -> Page:
+    """(contact_date DESC, id DESC) で並べて1ページ取得し、total_mode に応じて件数も数える（カーソルがあればキーセット）"""
+    return await fetch_page(
+        db, query, [Contact.contact_date.desc().nulls_first(), Contact.id.desc()], page, per_page,
+        cursor_filter=date_id_cursor_filter(Contact.contact_date, Contact.id, cursor) if cursor else None,
+        total_mode=total_mode
     )
+
+def _set_page_headers(response: Response, page_result: Page, per_page: int, next_cursor: Optional[Callable] = None):
+    """次ページカーソル・次ページの有無・件数をレスポンスヘッダーに設定（next_cursor 省略時は日付順のカーソル）"""
+    if page_result.has_more:
+        if next_cursor is None:
+            _set_next_cursor(response, page_result.items, per_page)
+        else:
+            cursor = next_cursor(page_result.items, per_page)
+            if cursor:
+                response.headers[NEXT_CURSOR_HEADER] = cursor
+    response.headers[HAS_MORE_HEADER] = "true" if page_result.has_more else "false"
+    if page_result.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page_result.total)
+
+def _set_next_cursor(response: Response, contacts: list, per_page: int):
+    """次ページカーソルをレスポンスヘッダーに設定"""
+    next_cursor = next_date_id_cursor(contacts, per_page, "contact_date")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+async def _sync_links(db: AsyncSession, table, link_column: str, model, contact_id: int, requested_ids: Optional[List[int]], is_new: bool = False, extra_ids: Iterable[int] = ()) -> Tuple[list, Dict[int, Any]]:
+    """関連テーブルの差分だけを反映し、(関連先の行, extra_idsの行) を返す（存在しないidは無視）
     
-    db.add(contact)
-    db.flush()  # IDを取得するためにflush
+    requested_ids が None の場合は変更せず現在の関連先を返す。
+    extra_ids は関連付けとは別にレスポンス用に必要な行（作成者など）で、同じクエリでまとめて取得する。
+    """
+    linked_ids = select(table.c[link_column]).where(table.c.contact_id == contact_id)
+    requested = set(requested_ids) if requested_ids is not None else None
+    extra = set(extra_ids)
+    if is_new:
+        wanted = (requested or set()) | extra
+        if not wanted:
+            return [], {}
+        result = await db.execute(select(model).where(model.id.in_(wanted)))
+        rows = [(obj, False) for obj in result.scalars().all()]
+    else:
+        # 関連先のデータと現在の関連有無を1回のクエリで取得
+        conditions = [model.id.in_(linked_ids)]
+        if requested:
+            conditions.append(model.id.in_(requested))
+        if extra:
+            conditions.append(model.id.in_(extra))
+        result = await db.execute(
+            select(model, model.id.in_(linked_ids).label("linked")).where(or_(*conditions))
+        )
+        rows = result.all()
+    fetched = {obj.id: obj for obj, _ in rows if obj.id in extra}
+    if requested is None:
+        return [obj for obj, linked in rows if linked], fetched
     
-    # 担当者の関連付け
-    if contact_data.person_ids:
-        persons = db.query(BusinessCard).filter(BusinessCard.id.in_(contact_data.person_ids)).all()
-        contact.persons = persons
+    targets = [obj for obj, _ in rows if obj.id in requested]
+    current = {obj.id for obj, linked in rows if linked}
+    removed = current - requested
+    if removed:
+        await db.execute(delete(table).where(
+            and_(table.c.contact_id == contact_id, table.c[link_column].in_(removed))
+        ))
+    added = [obj.id for obj in targets if obj.id not in current]
+    if added:
+        await db.execute(insert(table).values([
+            {"contact_id": contact_id, link_column: target_id} for target_id in added
+        ]))
+    return targets, fetched
+
+def _contact_response(row, persons: list, companions: list, coworker: Coworker) -> ContactSchema:
+    """書き込み結果からレスポンスを組み立て（再読み込みはしない）"""
+    return ContactSchema.model_validate({
+        **row._mapping,
+        "persons": persons,
+        "companions": companions,
+        "coworker": coworker,
+    }, from_attributes=True)
+
+@router.post("/", response_model=ContactSchema)
+async def create_contact(contact_data: ContactCreate, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """新規面談記録の作成"""
+    # 面談記録の作成（RETURNINGで採番結果ごと取得）
+    result = await db.execute(
+        insert(Contact.__table__).values(
+            contact_date=contact_data.contact_date,
+            location=contact_data.location,
+            title=contact_data.title,
+            summary_text=contact_data.summary_text,
+            raw_text=contact_data.raw_text,
+            details=contact_data.details,
+            status=contact_data.status,
+            department_id=current_user.department_id,
+            coworker_id=current_user.id
+        ).returning(*Contact.__table__.c)
+    )
+    row = result.one()
     
-    # 同席者の関連付け
-    if contact_data.companion_ids:
-        companions = db.query(Coworker).filter(Coworker.id.in_(contact_data.companion_ids)).all()
-        contact.companions = companions
+    # 担当者・同席者の関連付け（関連テーブルへ直接まとめて挿入）
+    # 作成者（レスポンス用）は同席者と同じクエリで取得する
+    persons, _ = await _sync_links(db, contact_person_table, "business_card_id", BusinessCard, row.id, contact_data.person_ids, is_new=True)
+    companions, fetched = await _sync_links(db, contact_companions_table, "coworker_id", Coworker, row.id, contact_data.companion_ids, is_new=True, extra_ids=[current_user.id])
+    coworker = fetched.get(current_user.id)
     
-    db.commit()
-    db.refresh(contact)
+    # 検索インデックスの更新（同一トランザクション内）
+    await search_service.index_document(db, row.id, search_service.build_document(row, persons, companions))
     
-    # リレーションデータを含めて再取得
-    contact = db.query(Contact).options(
-        joinedload(Contact.coworker),
-        joinedload(Contact.persons),
-        joinedload(Contact.companions)
-    ).filter(Contact.id == contact.id).first()
+    await db.commit()
     
-    return contact
+    return _contact_response(row, persons, companions, coworker)
 
 @router.put("/{contact_id}", response_model=ContactSchema)
-async def update_contact(contact_id: int, contact_data: ContactUpdate, current_user: Coworker = Depends(get_current_user), db: Session = Depends(get_db)):
+async def update_contact(contact_id: int, contact_data: ContactUpdate, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """面談記録の更新"""
-    contact = db.query(Contact).filter(
-        and_(Contact.id == contact_id, Contact.coworker_id == current_user.id)
-    ).first()
+    table = Contact.__table__
+    owned = and_(table.c.id == contact_id, table.c.coworker_id == current_user.id)
     
-    if not contact:
-        raise HTTPException(status_code=404, detail="面談記録が見つかりません")
+    # データの更新（所有者チェックを兼ねてRETURNINGで更新後の値を取得）
+    # 関連だけの変更でも version / updated_at を進めるため、項目の指定がなくても UPDATE する
+    values = contact_data.dict(exclude_unset=True, exclude={'person_ids', 'companion_ids'})
+    result = await db.execute(update(table).where(owned).values(**values).returning(*table.c))
+    row = result.first()
     
-    # データの更新
-    for field, value in contact_data.dict(exclude_unset=True, exclude={'person_ids', 'companion_ids'}).items():
-        setattr(contact, field, value)
+    if not row:
+        raise HTTPException(status_code=404, detail="面談記録が見つかりません")
     
-    # 担当者の更新
-    if contact_data.person_ids is not None:
-        persons = db.query(BusinessCard).filter(BusinessCard.id.in_(contact_data.person_ids)).all()
-        contact.persons = persons
+    # 担当者・同席者の更新（差分のみ）
+    # 作成者（レスポンス用）は同席者と同じクエリで取得する
+    persons, _ = await _sync_links(db, contact_person_table, "business_card_id", BusinessCard, contact_id, contact_data.person_ids)
+    companions, fetched = await _sync_links(db, contact_companions_table, "coworker_id", Coworker, contact_id, contact_data.companion_ids, extra_ids=[current_user.id])
+    coworker = fetched.get(current_user.id)
     
-    # 同席者の更新
-    if contact_data.companion_ids is not None:
-        companions = db.query(Coworker).filter(Coworker.id.in_(contact_data.companion_ids)).all()
-        contact.companions = companions
+    # 検索インデックスの更新（同一トランザクション内）
+    await search_service.index_document(db, contact_id, search_service.build_document(row, persons, companions))
     
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
     
-    # リレーションデータを含めて再取得
-    contact = db.query(Contact).options(
-        joinedload(Contact.coworker),
-        joinedload(Contact.persons),
-        joinedload(Contact.companions)
-    ).filter(Contact.id == contact.id).first()
+    return _contact_response(row, persons, companions, coworker)
+
+async def _insert_contact_chunk(db: AsyncSession, chunk: list, coworker_id: int, department_id: Optional[int], cards: dict, coworkers: dict) -> List[int]:
+    """面談記録と関連行を複数行INSERTでまとめて登録し、採番されたidを入力順で返す"""
+    table = Contact.__table__
+    created_at = datetime.utcnow()
+    result = await db.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True),
+        [
+            {
+                "contact_date": item.contact_date,
+                "location": item.location,
+                "created_at": created_at,
+                "title": item.title,
+                "summary_text": item.summary_text,
+                "raw_text": item.raw_text,
+                "details": item.details,
+                "status": item.status,
+                "department_id": department_id,
+                "coworker_id": coworker_id,
+            }
+            for _, item in chunk
+        ]
+    )
+    ids = list(result.scalars().all())
     
-    return contact
+    person_rows, companion_rows, documents = [], [], {}
+    for contact_id, (_, item) in zip(ids, chunk):
+        person_ids = list(dict.fromkeys(item.person_ids))
+        companion_ids = list(dict.fromkeys(item.companion_ids))
+        person_rows.extend({"contact_id": contact_id, "business_card_id": pid} for pid in person_ids)
+        companion_rows.extend({"contact_id": contact_id, "coworker_id": cid} for cid in companion_ids)
+        documents[contact_id] = search_service.build_document(
+            item, [cards[pid] for pid in person_ids], [coworkers[cid] for cid in companion_ids]
+        )
+    if person_rows:
+        await db.execute(insert(contact_person_table), person_rows)
+    if companion_rows:
+        await db.execute(insert(contact_companions_table), companion_rows)
+    await search_service.index_documents(db, documents)
+    return ids
 
-@router.get("/drafts", response_model=List[ContactSchema])
-async def get_drafts(current_user: Coworker = Depends(get_current_user), page: int = 1, per_page: int = 10, db: Session = Depends(get_db)):
-    """下書き一覧の取得"""
-    offset = (page - 1) * per_page
+@router.post("/bulk", response_model=ContactBulkResponse)
+async def bulk_create_contacts(bulk_data: ContactBulkRequest, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """面談記録の一括登録（他システムからの移行・CSV取り込み用）"""
+    items = bulk_data.items
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"一度に登録できるのは{BULK_MAX_ITEMS}件までです")
     
-    drafts = db.query(Contact).options(
-        joinedload(Contact.coworker),
-        joinedload(Contact.persons),
-        joinedload(Contact.companions)
-    ).filter(
-        and_(Contact.coworker_id == current_user.id, Contact.status == 0)
-    ).order_by(Contact.contact_date.desc()).offset(offset).limit(per_page).all()
+    # ロールバック後も参照できるよう、ユーザー情報と参照先は素の値で保持
+    coworker_id, department_id = current_user.id, current_user.department_id
+    
+    # 参照される担当者・同席者をそれぞれ1回のINクエリで解決
+    cards, coworkers = {}, {}
+    person_ids = {pid for item in items for pid in item.person_ids}
+    if person_ids:
+        result = await db.execute(
+            select(BusinessCard.id, BusinessCard.name, BusinessCard.company).where(BusinessCard.id.in_(person_ids))
+        )
+        cards = {row.id: row for row in result}
+    companion_ids = {cid for item in items for cid in item.companion_ids}
+    if companion_ids:
+        result = await db.execute(select(Coworker.id, Coworker.name).where(Coworker.id.in_(companion_ids)))
+        coworkers = {row.id: row for row in result}
     
-    return drafts
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        missing_persons = [pid for pid in item.person_ids if pid not in cards]
+        missing_companions = [cid for cid in item.companion_ids if cid not in coworkers]
+        if missing_persons:
+            results[index] = ContactBulkResult(index=index, error=f"存在しない担当者IDがあります: {missing_persons}")
+        elif missing_companions:
+            results[index] = ContactBulkResult(index=index, error=f"存在しない同席者IDがあります: {missing_companions}")
+        else:
+            valid.append((index, item))
+    
+    # チャンク単位のトランザクションで登録
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        chunk = valid[start:start + BULK_CHUNK_SIZE]
+        try:
+            ids = await _insert_contact_chunk(db, chunk, coworker_id, department_id, cards, coworkers)
+            await db.commit()
+        except SQLAlchemyError:
+            await db.rollback()
+            # 失敗したチャンクは1件ずつ登録し直して原因の行を特定
+            for entry in chunk:
+                try:
+                    [contact_id] = await _insert_contact_chunk(db, [entry], coworker_id, department_id, cards, coworkers)
+                    await db.commit()
+                    results[entry[0]] = ContactBulkResult(index=entry[0], id=contact_id)
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    results[entry[0]] = ContactBulkResult(index=entry[0], error=f"登録に失敗しました: {getattr(e, 'orig', None) or e}")
+            continue
+        for (index, _), contact_id in zip(chunk, ids):
+            results[index] = ContactBulkResult(index=index, id=contact_id)
+    
+    created = sum(1 for result in results if result.id is not None)
+    return ContactBulkResponse(created=created, failed=len(items) - created, results=results)
 
-@router.get("/history", response_model=List[ContactSchema])
-async def get_history(current_user: Coworker = Depends(get_current_user), page: int = 1, per_page: int = 10, db: Session = Depends(get_db)):
-    """作成履歴の取得"""
-    offset = (page - 1) * per_page
+@router.get("/drafts", response_model=List[ContactListItem], response_model_exclude_unset=True)
+async def get_drafts(response: Response, current_user: Principal = Depends(get_current_user), page: int = Query(1, ge=1), per_page: int = Query(10, ge=1, le=MAX_PER_PAGE), cursor: Optional[str] = None, fields: Optional[str] = None, total_mode: TotalMode = "none", db: AsyncSession = Depends(get_db)):
+    """下書き一覧の取得（cursor指定時はキーセットページング、次ページのカーソルは X-Next-Cursor、件数は X-Total-Count ヘッダー）"""
+    selected = _parse_fields(fields)
+    query = select(Contact).options(*_list_options(selected)).filter(
+        and_(Contact.coworker_id == current_user.id, Contact.status == 0)
+    )
+    
+    page_result = await _fetch_contacts(db, query, page, per_page, cursor, total_mode)
+    drafts = page_result.items
+    _set_page_headers(response, page_result, per_page)
     
-    history = db.query(Contact).options(
-        joinedload(Contact.coworker),
-        joinedload(Contact.persons),
-        joinedload(Contact.companions)
-    ).filter(
+    return [_to_list_item(contact, selected) for contact in drafts]
+
+@router.get("/history", response_model=List[ContactListItem], response_model_exclude_unset=True)
+async def get_history(response: Response, current_user: Principal = Depends(get_current_user), page: int = Query(1, ge=1), per_page: int = Query(10, ge=1, le=MAX_PER_PAGE), cursor: Optional[str] = None, fields: Optional[str] = None, total_mode: TotalMode = "none", db: AsyncSession = Depends(get_db)):
+    """作成履歴の取得（cursor指定時はキーセットページング、次ページのカーソルは X-Next-Cursor、件数は X-Total-Count ヘッダー）"""
+    selected = _parse_fields(fields)
+    query = select(Contact).options(*_list_options(selected)).filter(
         and_(Contact.coworker_id == current_user.id, Contact.status == 1)
-    ).order_by(Contact.contact_date.desc()).offset(offset).limit(per_page).all()
+    )
     
-    return history
+    page_result = await _fetch_contacts(db, query, page, per_page, cursor, total_mode)
+    history = page_result.items
+    _set_page_headers(response, page_result, per_page)
+    
+    return [_to_list_item(contact, selected) for contact in history]
 
-@router.post("/search", response_model=List[ContactSchema])
-async def search_contacts(search_data: SearchRequest, current_user: Coworker = Depends(get_current_user), db: Session = Depends(get_db)):
-    """面談記録の検索"""
-    offset = (search_data.page - 1) * search_data.per_page
+@router.get("/export")
+async def export_contacts(current_user: Principal = Depends(get_current_user), export_format: str = Query("csv", alias="format"), date_from: Optional[date] = None, date_to: Optional[date] = None, status: Optional[int] = None, include_raw_text: bool = False, db: AsyncSession = Depends(get_db)):
+    """部署の面談記録のエクスポート（CSV / NDJSON をサーバーサイドカーソルで逐次ストリーミング）"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="formatは csv または ndjson を指定してください")
+    
+    columns = [
+        Contact.id, Contact.contact_date, Contact.title, Contact.location, Contact.status,
+        Coworker.name.label("coworker_name"), Contact.created_at, Contact.summary_text, Contact.details
+    ]
+    if include_raw_text:
+        columns.append(Contact.raw_text)
+    
+    conditions = [Contact.department_id == current_user.department_id]
+    conditions.append(Contact.status == status if status is not None else Contact.status != 9)
+    if date_from:
+        conditions.append(Contact.contact_date >= date_from)
+    if date_to:
+        conditions.append(Contact.contact_date <= date_to)
+    
+    query = select(*columns).outerjoin(Coworker, Coworker.id == Contact.coworker_id).where(
+        and_(*conditions)
+    ).order_by(Contact.contact_date, Contact.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    async def generate():
+        # ORMオブジェクトは作らず、取得したバッチごとに書き出す（全件をメモリに載せない）
+        # ※ FastAPI 0.104 では get_db の後処理はレスポンス送信後のため、ストリーミング中もセッションは有効
+        result = await db.stream(query)
+        header = list(result.keys())
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(header)
+            yield "\ufeff" + buffer.getvalue()  # Excelで文字化けしないようBOMを付与
+            async for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+        else:
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(header, row)), ensure_ascii=False, default=str) + "\n"
+                    for row in rows
+                )
+    
+    filename = f"contacts_{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/search", response_model=List[ContactListItem], response_model_exclude_unset=True)
+async def search_contacts(search_data: SearchRequest, response: Response, current_user: Principal = Depends(get_current_user), fields: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """面談記録の検索（n-gram全文検索、関連度順。次ページのカーソルは X-Next-Cursor、件数は total_mode に応じて X-Total-Count ヘッダー）"""
+    selected = _parse_fields(fields)
     
     # 検索クエリの構築
-    query = db.query(Contact).options(
-        joinedload(Contact.coworker),
-        joinedload(Contact.persons),
-        joinedload(Contact.companions)
-    ).filter(
+    query = select(Contact).options(*_list_options(selected)).filter(
         and_(
             Contact.department_id == current_user.department_id,
-            Contact.status == 1,
-            or_(
-                Contact.title.ilike(f"%{search_data.keyword}%"),
-                Contact.persons.any(BusinessCard.name.ilike(f"%{search_data.keyword}%"))
-            )
+            Contact.status == 1
         )
-    ).order_by(Contact.contact_date.desc())
+    )
     
-    contacts = query.offset(offset).limit(search_data.per_page).all()
-    return contacts
+    ranked = search_service.ranked_contacts(db, search_data.keyword)
+    if ranked is None:
+        # 検索語がない場合は日付順の一覧
+        page_result = await _fetch_contacts(db, query, search_data.page, search_data.per_page, search_data.cursor, search_data.total_mode)
+        _set_page_headers(response, page_result, search_data.per_page)
+        return [_to_list_item(contact, selected) for contact in page_result.items]
+    
+    query = query.add_columns(ranked.c.score).join(ranked, ranked.c.contact_id == Contact.id)
+    page_result = await fetch_page(
+        db, query, [ranked.c.score.desc(), Contact.id.desc()], search_data.page, search_data.per_page,
+        cursor_filter=score_id_cursor_filter(ranked.c.score, Contact.id, search_data.cursor) if search_data.cursor else None,
+        total_mode=search_data.total_mode
+    )
+    _set_page_headers(response, page_result, search_data.per_page, next_score_id_cursor)
+    return [_to_list_item(contact, selected) for contact, _ in page_result.items]
+
+def _check_view_permission(contact, current_user: Principal):
+    """部署単位での閲覧権限チェック（ORMオブジェクトでも列だけの行でもよい）"""
+    if not current_user.can_view_contact(contact):
+        raise HTTPException(status_code=403, detail="閲覧権限がありません")
+
+@router.get("/batch", response_model=ContactBatchResponse)
+async def get_contacts_batch(ids: str, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """複数の面談記録をまとめて取得（ids=3,1,2 の指定順）
+
+    本体は1回のIN句で読み、関連はselectinloadでまとめて読む（件数によらずクエリ数は一定）。
+    閲覧権限のないものは get_contact と同じ規則で判定し、forbidden_ids に入れる。
+    """
+    id_list = parse_ids(ids)
+    result = await db.execute(
+        select(Contact).options(
+            joinedload(Contact.coworker),
+            selectinload(Contact.persons),
+            selectinload(Contact.companions)
+        ).where(Contact.id.in_(id_list))
+    )
+    contacts, missing_ids = order_by_ids(id_list, result.scalars().all())
+    return ContactBatchResponse(
+        items=[contact for contact in contacts if current_user.can_view_contact(contact)],
+        missing_ids=missing_ids,
+        forbidden_ids=[contact.id for contact in contacts if not current_user.can_view_contact(contact)]
+    )
+
+# 詳細の本文に含む関連行（担当者の名刺、作成者と同席者）のバージョンの合計と最終更新日時（相関サブクエリ、本文は読まない）
+_linked_cards = contact_person_table.join(BusinessCard, BusinessCard.id == contact_person_table.c.business_card_id)
+_linked_coworkers = or_(
+    Coworker.id == Contact.coworker_id,
+    Coworker.id.in_(select(contact_companions_table.c.coworker_id).where(contact_companions_table.c.contact_id == Contact.id))
+)
+LINKED_VALIDATOR_COLUMNS = [
+    select(func.coalesce(func.sum(BusinessCard.version), 0)).select_from(_linked_cards)
+    .where(contact_person_table.c.contact_id == Contact.id).scalar_subquery().label("card_versions"),
+    select(func.max(BusinessCard.updated_at)).select_from(_linked_cards)
+    .where(contact_person_table.c.contact_id == Contact.id).scalar_subquery().label("cards_updated_at"),
+    select(func.coalesce(func.sum(Coworker.version), 0)).where(_linked_coworkers).scalar_subquery().label("coworker_versions"),
+    select(func.max(Coworker.updated_at)).where(_linked_coworkers).scalar_subquery().label("coworkers_updated_at"),
+]
+
+def _contact_validators(contact_id: int, version: int, updated_at: Optional[datetime], card_versions: int, coworker_versions: int, *linked_updated_at: Optional[datetime]) -> Tuple[str, Optional[datetime]]:
+    """面談記録の詳細の (ETag, Last-Modified)。関連行の更新でも変わるよう、そのバージョンの合計も含める"""
+    etag = version_etag("contact", contact_id, version, (int(card_versions), int(coworker_versions)))
+    candidates = [value for value in (updated_at, *linked_updated_at) if value is not None]
+    return etag, max(candidates) if candidates else None
 
 @router.get("/{contact_id}", response_model=ContactSchema)
-async def get_contact(contact_id: int, current_user: Coworker = Depends(get_current_user), db: Session = Depends(get_db)):
-    """面談記録の詳細取得"""
-    contact = db.query(Contact).options(
-        joinedload(Contact.coworker),
-        joinedload(Contact.persons),
-        joinedload(Contact.companions)
-    ).filter(Contact.id == contact_id).first()
+async def get_contact(contact_id: int, request: Request, response: Response, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """面談記録の詳細取得（ETag / Last-Modified 付き、条件付きGETで変更がなければ304）"""
+    if request.headers.get("if-none-match") or request.headers.get("if-modified-since"):
+        # バージョンと権限判定に必要な列だけを読む（本文・関連行の内容は読まない）
+        result = await db.execute(
+            select(
+                Contact.version, Contact.updated_at, Contact.department_id, Contact.coworker_id, *LINKED_VALIDATOR_COLUMNS
+            ).where(Contact.id == contact_id)
+        )
+        row = result.first()
+        if not row:
+            raise HTTPException(status_code=404, detail="面談記録が見つかりません")
+        _check_view_permission(row, current_user)
+        etag, last_modified = _contact_validators(
+            contact_id, row.version, row.updated_at, row.card_versions, row.coworker_versions,
+            row.cards_updated_at, row.coworkers_updated_at
+        )
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+    
+    result = await db.execute(
+        select(Contact).options(
+            joinedload(Contact.coworker),
+            joinedload(Contact.persons),
+            joinedload(Contact.companions)
+        ).filter(Contact.id == contact_id)
+    )
+    contact = result.unique().scalars().first()
     
     if not contact:
         raise HTTPException(status_code=404, detail="面談記録が見つかりません")
     
-    # 部署単位での閲覧権限チェック
-    if contact.department_id != current_user.department_id and contact.coworker_id != current_user.id:
-        raise HTTPException(status_code=403, detail="閲覧権限がありません")
+    _check_view_permission(contact, current_user)
     
+    # 読み込んだ関連行から、軽量な経路と同じ規則で検証子を作る（作成者が同席者にもいれば1回だけ数える）
+    coworkers = {coworker.id: coworker for coworker in [contact.coworker, *contact.companions] if coworker is not None}
+    etag, last_modified = _contact_validators(
+        contact.id, contact.version, contact.updated_at,
+        sum(person.version for person in contact.persons), sum(coworker.version for coworker in coworkers.values()),
+        *(person.updated_at for person in contact.persons), *(coworker.updated_at for coworker in coworkers.values())
+    )
+    response.headers.update(validator_headers(etag, last_modified))
     return contact
 
 @router.delete("/{contact_id}")
-async def delete_contact(contact_id: int, current_user: Coworker = Depends(get_current_user), db: Session = Depends(get_db)):
+async def delete_contact(contact_id: int, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """面談記録の削除（status=9に設定）"""
-    contact = db.query(Contact).filter(
-        and_(Contact.id == contact_id, Contact.coworker_id == current_user.id)
-    ).first()
+    result = await db.execute(
+        select(Contact).filter(
+            and_(Contact.id == contact_id, Contact.coworker_id == current_user.id)
+        )
+    )
+    contact = result.scalars().first()
     
     if not contact:
         raise HTTPException(status_code=404, detail="面談記録が見つかりません")
     
     contact.status = 9
-    db.commit()
+    await search_service.remove_contact(db, contact.id)
+    await db.commit()
     
     return {"message": "面談記録を破棄しました"}
 
-@router.post("/summarize", response_model=SummaryResponse)
-async def summarize_content(summary_data: SummaryRequest):
-    """OpenAIによる面談内容の要約"""
-    if not summary_data.text or not summary_data.text.strip():
+def _validate_summary_text(text: str):
+    """要約入力のチェック"""
+    if not text or not text.strip():
         raise HTTPException(status_code=400, detail="要約する内容が入力されていません")
     
-    if len(summary_data.text) > 10000:
-        raise HTTPException(status_code=400, detail="入力テキストが長すぎます（10,000文字以下にしてください）")
+    if len(text) > SUMMARY_MAX_INPUT_CHARS:
+        raise HTTPException(status_code=400, detail=f"入力テキストが長すぎます（{SUMMARY_MAX_INPUT_CHARS:,}文字以下にしてください）")
+
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events の1イベント分"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/summarize", response_model=SummaryResponse)
+async def summarize_content(summary_data: SummaryRequest, db: AsyncSession = Depends(get_db)):
+    """OpenAIによる面談内容の要約"""
+    _validate_summary_text(summary_data.text)
     
     try:
-        summary = await summarize_meeting_content(summary_data.text)
+        summary = await summarize_meeting_content(summary_data.text, db=db)
         return SummaryResponse(summary=summary)
     except Exception as e:
         # ログ出力
@@ -194,4 +571,35 @@ async def summarize_content(summary_data: SummaryRequest):
         logger = logging.getLogger(__name__)
         logger.error(f"要約生成エラー: {str(e)}")
         
-        raise HTTPException(status_code=500, detail=f"要約の生成に失敗しました: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"要約の生成に失敗しました: {str(e)}")
+
+@router.post("/summarize/stream")
+async def summarize_content_stream(summary_data: SummaryRequest, db: AsyncSession = Depends(get_db)):
+    """OpenAIによる面談内容の要約（Server-Sent Eventsでトークンを逐次送信）
+    
+    event: token（data: {"text": ...}）を繰り返し、最後に event: done（data: {"summary": 全文}）を送る。
+    失敗時は event: error（data: {"detail": ...}）。クライアントが切断すると生成を打ち切る。
+    """
+    _validate_summary_text(summary_data.text)
+    
+    async def event_stream():
+        parts = []
+        try:
+            async for token in stream_meeting_summary(summary_data.text, db=db):
+                parts.append(token)
+                yield _sse("token", {"text": token})
+        except EmptySummaryError:
+            yield _sse("error", {"detail": "要約の生成に失敗しました（応答が空）。"})
+            return
+        except Exception as e:
+            logger.error(f"要約生成エラー: {str(e)}")
+            yield _sse("error", {"detail": describe_error(e)})
+            return
+        yield _sse("done", {"summary": "".join(parts).strip()})
+    
+    # 切断時は StreamingResponse がジェネレーターをキャンセルし、OpenAIへのストリームも閉じられる
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
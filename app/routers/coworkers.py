@@ -1,39 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.database.connection import get_db
+from app.utils.pagination import id_cursor_filter, next_id_cursor, fetch_page, total_pages
+from app.services.suggest_index import coworker_index
+from app.services.coworker_directory import coworker_directory, serialize_coworker, COWORKER_COLUMNS
+from app.utils.batch_lookup import parse_ids
+from app.utils.http_cache import cached_json_response
 from app.models.models import Coworker
-from app.schemas.schemas import Coworker as CoworkerSchema, CoworkerCreate, SearchRequest, SearchResponse
+from app.schemas.schemas import Coworker as CoworkerSchema, CoworkerBatchResponse, CoworkerCreate, SearchRequest, SearchResponse
 
 router = APIRouter()
 
 @router.post("/", response_model=CoworkerSchema)
-async def create_coworker(coworker_data: CoworkerCreate, db: Session = Depends(get_db)):
+async def create_coworker(coworker_data: CoworkerCreate, db: AsyncSession = Depends(get_db)):
     """社内メンバーの作成"""
     coworker = Coworker(**coworker_data.dict())
     db.add(coworker)
-    db.commit()
-    db.refresh(coworker)
+    await db.commit()
+    await db.refresh(coworker)
+    coworker_index.add(coworker)
+    # コミット後にも世代を進め、コミット前の内容で作られたスナップショットを捨てる
+    coworker_directory.invalidate()
     return coworker
 
 @router.get("/", response_model=List[CoworkerSchema])
-async def get_coworkers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """社内メンバー一覧の取得"""
-    coworkers = db.query(Coworker).offset(skip).limit(limit).all()
-    return coworkers
+async def get_coworkers(request: Request, skip: int = Query(0, ge=0), limit: int = Query(100, ge=0), db: AsyncSession = Depends(get_db)):
+    """社内メンバー一覧の取得（シリアライズ済みのスナップショットから返し、ETag一致なら304）"""
+    await coworker_directory.ensure_built(db)
+    content, etag = coworker_directory.list_view(skip, limit)
+    return cached_json_response(request, content, etag)
 
 @router.post("/search", response_model=SearchResponse)
-async def search_coworkers(search_data: SearchRequest, db: Session = Depends(get_db)):
+async def search_coworkers(search_data: SearchRequest, db: AsyncSession = Depends(get_db)):
     """社内メンバーの検索"""
-    offset = (search_data.page - 1) * search_data.per_page
-    
     # 名前で部分一致検索
-    query = db.query(Coworker).filter(
+    query = select(Coworker).filter(
         Coworker.name.ilike(f"%{search_data.keyword}%")
     )
     
-    total = query.count()
-    coworkers = query.offset(offset).limit(search_data.per_page).all()
+    # 件数は total_mode に応じて同じSQL文の中で数える（または数えない）
+    cursor_filter = id_cursor_filter(Coworker.id, search_data.cursor) if search_data.cursor else None
+    page_result = await fetch_page(
+        db, query, [Coworker.id], search_data.page, search_data.per_page,
+        cursor_filter=cursor_filter, total_mode=search_data.total_mode
+    )
+    coworkers = page_result.items
     
     items = []
     for coworker in coworkers:
@@ -46,16 +59,48 @@ async def search_coworkers(search_data: SearchRequest, db: Session = Depends(get
     
     return SearchResponse(
         items=items,
-        total=total,
+        total=page_result.total,
         page=search_data.page,
         per_page=search_data.per_page,
-        total_pages=(total + search_data.per_page - 1) // search_data.per_page
+        total_pages=total_pages(page_result.total, search_data.per_page),
+        next_cursor=next_id_cursor(coworkers, search_data.per_page) if page_result.has_more else None,
+        has_more=page_result.has_more,
+        total_mode=search_data.total_mode
     )
 
+@router.get("/suggest", response_model=List[CoworkerSchema])
+async def suggest_coworkers(q: str = "", limit: int = Query(10, ge=1, le=50), db: AsyncSession = Depends(get_db)):
+    """入力中の文字列に前方一致する社内メンバーの候補（名前・メールアドレスとその読み、メモリ内インデックスで応答）"""
+    await coworker_index.ensure_loaded(db)
+    return coworker_index.search(q, limit)
+
+@router.get("/batch", response_model=CoworkerBatchResponse)
+async def get_coworkers_batch(ids: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """複数の社内メンバーをまとめて取得（ids=3,1,2 の指定順で返し、見つからないidは missing_ids に入れる）
+
+    スナップショットにあるものはDBを読まず、ないものだけを1回のIN句で取得する。
+    """
+    id_list = parse_ids(ids)
+    await coworker_directory.ensure_built(db)
+    absent = [coworker_id for coworker_id in id_list if coworker_directory.item(coworker_id) is None]
+    extra = {}
+    if absent:
+        result = await db.execute(select(*COWORKER_COLUMNS).where(Coworker.id.in_(absent)))
+        extra = {row.id: serialize_coworker(row) for row in result}
+    return cached_json_response(request, coworker_directory.batch_view(id_list, extra))
+
 @router.get("/{coworker_id}", response_model=CoworkerSchema)
-async def get_coworker(coworker_id: int, db: Session = Depends(get_db)):
-    """社内メンバーの詳細取得"""
-    coworker = db.query(Coworker).filter(Coworker.id == coworker_id).first()
-    if not coworker:
+async def get_coworker(coworker_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """社内メンバーの詳細取得（シリアライズ済みのスナップショットから返し、ETag一致なら304）"""
+    await coworker_directory.ensure_built(db)
+    item = coworker_directory.item(coworker_id)
+    if item is not None:
+        content, etag = item
+        return cached_json_response(request, content, etag)
+    
+    # 他プロセスで追加されたばかりでスナップショットにない場合
+    result = await db.execute(select(*COWORKER_COLUMNS).where(Coworker.id == coworker_id))
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="社内メンバーが見つかりません")
-    return coworker
\ No newline at end of file
+    return cached_json_response(request, serialize_coworker(row))
\ No newline at end of file
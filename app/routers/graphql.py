@@ -0,0 +1,53 @@
+import logging
+from inspect import isawaitable
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from graphql import GraphQLError, execute, parse, validate
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.connection import get_db
+from app.schemas.graphql_schema import schema
+from app.schemas.schemas import GraphQLRequest
+from app.services.graphql_loaders import RequestLoaders
+from app.utils.dependencies import get_current_user
+from app.utils.graphql_limits import query_limits
+from app.utils.principal_cache import Principal
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _error_response(errors: list) -> JSONResponse:
+    """構文・検証・上限のエラー（実行しない）"""
+    return JSONResponse(status_code=400, content={"errors": [error.formatted for error in errors]})
+
+@router.post("")
+async def graphql_query(request_data: GraphQLRequest, current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """GraphQL（面談記録・名刺・社内メンバーとその関連）
+
+    関連はリクエストごとのDataLoaderでまとめて読み、階層の深さと複雑度の上限を超えるクエリは実行前に400で拒否する。
+    """
+    try:
+        document = parse(request_data.query)
+    except GraphQLError as e:
+        return _error_response([e])
+    errors = validate(schema.graphql_schema, document)
+    if not errors:
+        errors = query_limits.check(schema.graphql_schema, document, request_data.variables)
+    if errors:
+        return _error_response(errors)
+    
+    loaders = RequestLoaders(db, current_user)
+    result = execute(
+        schema.graphql_schema, document, context_value=loaders,
+        variable_values=request_data.variables, operation_name=request_data.operation_name
+    )
+    if isawaitable(result):
+        result = await result
+    logger.debug(f"GraphQL: SQL {loaders.statements}回")
+    
+    content = {"data": result.data}
+    if result.errors:
+        for error in result.errors:
+            if error.original_error is not None and not isinstance(error.original_error, GraphQLError):
+                logger.error(f"GraphQL実行エラー: {str(error.original_error)}")
+        content["errors"] = [error.formatted for error in result.errors]
+    return JSONResponse(content=content)
@@ -0,0 +1,123 @@
+import graphene
+from graphql import GraphQLError
+from app.utils.graphql_limits import query_limits
+
+# 各型はCoreの行（列名の属性を持つ Row）から解決する。info.context は services.graphql_loaders.RequestLoaders で、関連はそのDataLoaderで読む
+
+def _limit(limit: int) -> int:
+    """件数の上限を超えないよう丸める（上限の判定は実行前に QueryLimits で済んでいる）"""
+    return max(0, min(limit, query_limits.max_list_size))
+
+def _check_offset(offset: int):
+    if offset < 0:
+        raise GraphQLError("offset は0以上にしてください")
+
+def _limit_arg() -> graphene.Int:
+    # null を渡して LIMIT を外せないよう NonNull にする
+    return graphene.Int(required=True, default_value=20)
+
+def _offset_arg() -> graphene.Int:
+    return graphene.Int(required=True, default_value=0)
+
+class BusinessCard(graphene.ObjectType):
+    """名刺（外部担当者）"""
+    id = graphene.Int(required=True)
+    name = graphene.String(required=True)
+    name_kana = graphene.String()
+    company = graphene.String(required=True)
+    company_kana = graphene.String()
+    department = graphene.String()
+    position = graphene.String()
+    memo = graphene.String()
+    version = graphene.Int()
+    updated_at = graphene.DateTime()
+
+class Coworker(graphene.ObjectType):
+    """社内メンバー"""
+    id = graphene.Int(required=True)
+    name = graphene.String(required=True)
+    name_kana = graphene.String()
+    position = graphene.String()
+    email = graphene.String(required=True)
+    sso_id = graphene.String()
+    department_id = graphene.Int()
+    created_contacts = graphene.List(
+        graphene.NonNull(lambda: Contact), limit=_limit_arg(),
+        description="作成した面談記録（閲覧できるもののみ、新しい順）"
+    )
+
+    async def resolve_created_contacts(parent, info, limit):
+        return await info.context.created_contacts(_limit(limit)).load(parent.id)
+
+class Contact(graphene.ObjectType):
+    """面談記録"""
+    id = graphene.Int(required=True)
+    contact_date = graphene.Date()
+    location = graphene.String()
+    title = graphene.String()
+    summary_text = graphene.String()
+    raw_text = graphene.String()
+    details = graphene.String()
+    status = graphene.Int(required=True)
+    department_id = graphene.Int()
+    created_at = graphene.DateTime()
+    version = graphene.Int()
+    updated_at = graphene.DateTime()
+    coworker = graphene.Field(Coworker, description="作成者")
+    persons = graphene.List(graphene.NonNull(BusinessCard), description="外部担当者")
+    companions = graphene.List(graphene.NonNull(Coworker), description="同席者")
+
+    async def resolve_coworker(parent, info):
+        if parent.coworker_id is None:
+            return None
+        return await info.context.coworker.load(parent.coworker_id)
+
+    async def resolve_persons(parent, info):
+        return await info.context.contact_persons.load(parent.id)
+
+    async def resolve_companions(parent, info):
+        return await info.context.contact_companions.load(parent.id)
+
+class Query(graphene.ObjectType):
+    contact = graphene.Field(Contact, id=graphene.Int(required=True))
+    contacts = graphene.List(
+        graphene.NonNull(Contact), ids=graphene.List(graphene.NonNull(graphene.Int)), status=graphene.Int(),
+        limit=_limit_arg(), offset=_offset_arg(),
+        description="閲覧できる面談記録（ids 指定時はその順、なければ新しい順）"
+    )
+    business_card = graphene.Field(BusinessCard, id=graphene.Int(required=True))
+    business_cards = graphene.List(
+        graphene.NonNull(BusinessCard), ids=graphene.List(graphene.NonNull(graphene.Int)),
+        limit=_limit_arg(), offset=_offset_arg()
+    )
+    coworker = graphene.Field(Coworker, id=graphene.Int(required=True))
+    coworkers = graphene.List(
+        graphene.NonNull(Coworker), ids=graphene.List(graphene.NonNull(graphene.Int)),
+        limit=_limit_arg(), offset=_offset_arg()
+    )
+
+    async def resolve_contact(root, info, id):
+        contact = await info.context.contact.load(id)
+        if contact is not None and not info.context.user.can_view_contact(contact):
+            raise GraphQLError("閲覧権限がありません")
+        return contact
+
+    async def resolve_contacts(root, info, limit, offset, ids=None, status=None):
+        _check_offset(offset)
+        return await info.context.contacts(ids, status, _limit(limit), offset)
+
+    async def resolve_business_card(root, info, id):
+        return await info.context.business_card.load(id)
+
+    async def resolve_business_cards(root, info, limit, offset, ids=None):
+        _check_offset(offset)
+        return await info.context.business_cards(ids, _limit(limit), offset)
+
+    async def resolve_coworker(root, info, id):
+        return await info.context.coworker.load(id)
+
+    async def resolve_coworkers(root, info, limit, offset, ids=None):
+        _check_offset(offset)
+        return await info.context.coworkers(ids, _limit(limit), offset)
+
+schema = graphene.Schema(query=Query)
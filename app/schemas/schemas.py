@@ -1,11 +1,19 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime, date
 
+# 一覧・検索の1ページあたりの最大件数
+MAX_PER_PAGE = 100
+
+# 一覧・検索の件数の数え方
+TotalMode = Literal["exact", "estimated", "none"]
+
 # 基本スキーマ
 class BusinessCardBase(BaseModel):
     name: str
     company: str
+    name_kana: Optional[str] = None
+    company_kana: Optional[str] = None
     department: Optional[str] = None
     position: Optional[str] = None
     memo: Optional[str] = None
@@ -15,12 +23,30 @@ class BusinessCardCreate(BusinessCardBase):
 
 class BusinessCard(BusinessCardBase):
     id: int
+    version: Optional[int] = None
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class BusinessCardBatchResponse(BaseModel):
+    items: List[BusinessCard]  # 指定順
+    missing_ids: List[int] = []
+
+class BusinessCardImportRowError(BaseModel):
+    row: int  # ファイル上の行番号（見出しを1行目とする）
+    error: str
+
+class BusinessCardImportResponse(BaseModel):
+    total_rows: int = 0
+    imported: int = 0
+    duplicates: int = 0  # ファイル内・既存の名刺と重複してスキップした件数
+    failed: int = 0
+    errors: List[BusinessCardImportRowError] = []  # 先頭1000件まで
+
 class CoworkerBase(BaseModel):
     name: str
+    name_kana: Optional[str] = None
     position: Optional[str] = None
     email: str
     sso_id: Optional[str] = None
@@ -35,6 +61,10 @@ class Coworker(CoworkerBase):
     class Config:
         from_attributes = True
 
+class CoworkerBatchResponse(BaseModel):
+    items: List[Coworker]  # 指定順
+    missing_ids: List[int] = []
+
 class AuthUserCreate(BaseModel):
     coworker_id: int
     password: str
@@ -69,6 +99,8 @@ class Contact(ContactBase):
     id: int
     coworker_id: Optional[int] = None
     created_at: datetime
+    version: Optional[int] = None
+    updated_at: Optional[datetime] = None
     persons: List[BusinessCard] = []
     companions: List[Coworker] = []
     coworker: Optional[Coworker] = None
@@ -76,6 +108,35 @@ class Contact(ContactBase):
     class Config:
         from_attributes = True
 
+class ContactBatchResponse(BaseModel):
+    items: List[Contact]  # 指定順（閲覧権限のあるもののみ）
+    missing_ids: List[int] = []
+    forbidden_ids: List[int] = []
+
+class ContactBulkRequest(BaseModel):
+    items: List[ContactCreate]
+
+class ContactBulkResult(BaseModel):
+    index: int  # リクエスト内の位置
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class ContactBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ContactBulkResult]
+
+class ContactListItem(BaseModel):
+    """一覧表示用の軽量スキーマ（本文は含めない、fields指定時は指定項目のみ）"""
+    id: int
+    title: Optional[str] = None
+    contact_date: Optional[date] = None
+    location: Optional[str] = None
+    status: Optional[int] = None
+    coworker_name: Optional[str] = None
+    person_names: Optional[List[str]] = None
+    summary_excerpt: Optional[str] = None
+
 # 認証関連
 class LoginRequest(BaseModel):
     user_id: int
@@ -85,19 +146,39 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str
     user: Coworker
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str
+    refresh_token: str
 
 # 検索関連
 class SearchRequest(BaseModel):
     keyword: str
-    page: int = 1
-    per_page: int = 5
+    page: int = Field(1, ge=1)
+    per_page: int = Field(5, ge=1, le=MAX_PER_PAGE)
+    cursor: Optional[str] = None  # 指定時はpageを無視してキーセットページング
+    total_mode: TotalMode = "exact"  # exact: 正確な件数 / estimated: 推定件数 / none: 数えない
 
 class SearchResponse(BaseModel):
     items: List[dict]
-    total: int
+    total: Optional[int] = None  # total_mode="none" のときは None
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total_mode: TotalMode = "exact"
+
+# GraphQL
+class GraphQLRequest(BaseModel):
+    query: str
+    variables: Optional[dict] = None
+    operation_name: Optional[str] = Field(None, alias="operationName")
 
 # OpenAI要約関連
 class SummaryRequest(BaseModel):
@@ -0,0 +1,170 @@
+import io
+import logging
+import unicodedata
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+import pandas as pd
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.models.models import BusinessCard
+from app.schemas.schemas import BusinessCardImportResponse, BusinessCardImportRowError
+from app.services.suggest_index import normalize_key
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+MAX_LENGTH = 255
+
+# 取り込む列と、表計算ファイルで使われがちな見出し
+COLUMN_ALIASES = {
+    "name": ("name", "氏名", "名前", "担当者名"),
+    "name_kana": ("name_kana", "フリガナ", "ふりがな", "氏名(カナ)", "氏名カナ", "読み"),
+    "company": ("company", "会社名", "会社", "企業名"),
+    "company_kana": ("company_kana", "会社名(カナ)", "会社名カナ", "会社名フリガナ"),
+    "department": ("department", "部署", "部署名"),
+    "position": ("position", "役職"),
+    "memo": ("memo", "メモ", "備考"),
+}
+COLUMNS = list(COLUMN_ALIASES)
+REQUIRED_COLUMNS = ("name", "company")
+
+class ImportFormatError(Exception):
+    """ファイル形式・見出しが不正"""
+
+def _clean(value) -> Optional[str]:
+    """全角英数・半角カナの揺れと前後・連続空白を正規化"""
+    if value is None:
+        return None
+    text = " ".join(unicodedata.normalize("NFKC", str(value)).split())
+    return text or None
+
+def _column_map(headers: List[str]) -> Dict[str, str]:
+    """ファイルの見出し -> 取り込む列名"""
+    lookup = {_clean(alias).lower(): column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+    mapping = {}
+    for header in headers:
+        column = lookup.get((_clean(header) or "").lower())
+        if column and column not in mapping.values():
+            mapping[header] = column
+    missing = [column for column in REQUIRED_COLUMNS if column not in mapping.values()]
+    if missing:
+        raise ImportFormatError(f"必須の列がありません: {', '.join(missing)}")
+    return mapping
+
+def read_chunks(data: bytes, filename: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """CSV/XLSX を文字列のDataFrameとして chunk_size 行ずつ読む（CSVは UTF-8 → Shift_JIS の順に試す）"""
+    name = (filename or "").lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        try:
+            frame = pd.read_excel(io.BytesIO(data), dtype=str, keep_default_na=False)
+        except ImportError:
+            raise ImportFormatError("Excelファイルの読み込みには openpyxl が必要です")
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+        return
+    if not name.endswith((".csv", ".txt")):
+        raise ImportFormatError("CSV または XLSX ファイルを指定してください")
+
+    for encoding in ("utf-8-sig", "cp932"):
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ImportFormatError("文字コードを判別できません（UTF-8 または Shift_JIS）")
+    # 空行も1行として読み、行番号をファイル上の位置と一致させる
+    yield from pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False, skip_blank_lines=False, chunksize=chunk_size)
+
+def _card_key(name: str, company: str) -> Tuple[str, str]:
+    """重複判定のキー（表記揺れを吸収した氏名と会社名）"""
+    return normalize_key(name), normalize_key(company)
+
+def _parse_rows(frame: pd.DataFrame, mapping: Dict[str, str], first_row: int, seen: Set[Tuple[str, str]], report: BusinessCardImportResponse) -> List[tuple]:
+    """1チャンク分を検証・正規化し、新規の行だけを COLUMNS 順のタプルで返す"""
+    frame = frame[list(mapping)].rename(columns=mapping)
+    records = []
+    for offset, values in enumerate(frame.itertuples(index=False, name=None)):
+        card = dict.fromkeys(COLUMNS)
+        card.update({column: _clean(value) for column, value in zip(frame.columns, values)})
+        if not any(card.values()):
+            continue  # 空行
+        row_number = first_row + offset
+        report.total_rows += 1
+
+        error = None
+        missing = [column for column in REQUIRED_COLUMNS if not card[column]]
+        too_long = [column for column in COLUMNS if column != "memo" and card[column] and len(card[column]) > MAX_LENGTH]
+        if missing:
+            error = f"必須項目が空です: {', '.join(missing)}"
+        elif too_long:
+            error = f"{MAX_LENGTH}文字を超えています: {', '.join(too_long)}"
+        if error:
+            report.failed += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append(BusinessCardImportRowError(row=row_number, error=error))
+            continue
+
+        key = _card_key(card["name"], card["company"])
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        records.append(tuple(card[column] for column in COLUMNS))
+    return records
+
+async def _existing_keys(db: AsyncSession) -> Set[Tuple[str, str]]:
+    result = await db.stream(select(BusinessCard.name, BusinessCard.company).execution_options(yield_per=IMPORT_CHUNK_SIZE))
+    return {_card_key(name, company) async for name, company in result}
+
+async def _copy_records(db: AsyncSession, records: List[tuple]):
+    """PostgreSQL(asyncpg) は COPY、それ以外は複数行 INSERT で投入"""
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        # セッションのトランザクション内で、asyncpg の接続から直接 COPY する
+        # （セッション側のトランザクションが未開始でも、このチャンクはアトミックに投入される）
+        driver_connection = (await conn.get_raw_connection()).driver_connection
+        async with driver_connection.transaction():
+            await driver_connection.copy_records_to_table(
+                BusinessCard.__tablename__, records=records, columns=COLUMNS
+            )
+    else:
+        await db.execute(insert(BusinessCard.__table__), [dict(zip(COLUMNS, record)) for record in records])
+
+async def import_business_cards(db: AsyncSession, data: bytes, filename: str, chunk_size: int = IMPORT_CHUNK_SIZE, on_progress: Optional[Callable[[BusinessCardImportResponse], None]] = None) -> BusinessCardImportResponse:
+    """名刺の一括取り込み（チャンクごとに検証・重複除外・投入・コミット）
+
+    重複は、ファイル内および既存の名刺と氏名＋会社名（表記揺れを吸収）が一致するものとしてスキップする。
+    """
+    report = BusinessCardImportResponse()
+    seen = await _existing_keys(db)
+    chunks = read_chunks(data, filename, chunk_size)
+    mapping = None
+    first_row = 2
+
+    while True:
+        # パースはCPU処理なのでイベントループ外で実行
+        try:
+            frame = await run_in_threadpool(next, chunks, None)
+        except (pd.errors.ParserError, ValueError) as e:
+            raise ImportFormatError(f"{first_row}行目付近のファイルを読み込めません: {str(e)}")
+        if frame is None:
+            break
+        if mapping is None:
+            mapping = _column_map(list(frame.columns))
+        records = _parse_rows(frame, mapping, first_row, seen, report)
+        first_row += len(frame)
+
+        if records:
+            await _copy_records(db, records)
+            await db.commit()
+            report.imported += len(records)
+
+        logger.info(f"名刺取り込み: {report.total_rows}行処理、{report.imported}件登録")
+        if on_progress:
+            on_progress(report)
+
+    if mapping is None:
+        raise ImportFormatError("データがありません")
+    return report
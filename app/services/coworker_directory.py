@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+import orjson
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Coworker
+from app.schemas.schemas import Coworker as CoworkerSchema
+from app.utils.http_cache import make_etag
+
+# スキーマ（schemas.Coworker）と同じ項目だけをCoreで取得し、orjsonで直接シリアライズする
+COWORKER_COLUMNS = [Coworker.__table__.c[name] for name in CoworkerSchema.model_fields]
+
+def serialize_coworker(row) -> bytes:
+    """Coreの行（COWORKER_COLUMNS）をJSONバイト列に変換"""
+    return orjson.dumps(dict(row._mapping))
+
+class CoworkerDirectory:
+    """社内メンバー一覧のスナップショット（各メンバーをJSONバイト列にシリアライズ済みで保持）
+
+    ORM経由の追加・更新・削除で世代番号を進め、次のリクエストで作り直す。
+    別プロセスでの変更は refresh_seconds ごとの再読み込みで取り込む。
+    """
+
+    def __init__(self, refresh_seconds: float = 60, max_views: int = 64):
+        self.refresh_seconds = refresh_seconds
+        self.max_views = max_views
+        self.generation = 0
+        self._built_generation: Optional[int] = None
+        self._built_at = 0.0
+        self._ids: List[int] = []
+        self._items: Dict[int, Tuple[bytes, str]] = {}  # id -> (JSON, ETag)
+        self._views: Dict[Tuple[int, int], Tuple[bytes, str]] = {}  # (skip, limit) -> (JSON, ETag)
+        self._lock = asyncio.Lock()
+        self.stats = {"rebuilds": 0, "view_builds": 0}
+
+    def invalidate(self):
+        """社内メンバーの変更時に世代を進める"""
+        self.generation += 1
+
+    def _is_fresh(self) -> bool:
+        return self._built_generation == self.generation and time.monotonic() - self._built_at < self.refresh_seconds
+
+    async def ensure_built(self, db: AsyncSession):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            generation = self.generation
+            result = await db.execute(select(*COWORKER_COLUMNS).order_by(Coworker.id))
+            items = {}
+            for row in result:
+                content = serialize_coworker(row)
+                items[row.id] = (content, make_etag(content))
+            self._ids, self._items, self._views = list(items), items, {}
+            self._built_generation, self._built_at = generation, time.monotonic()
+            self.stats["rebuilds"] += 1
+
+    def list_view(self, skip: int, limit: int) -> Tuple[bytes, str]:
+        """一覧の (JSON, ETag)。シリアライズ済みの要素を連結するだけで作る"""
+        key = (skip, limit)
+        view = self._views.get(key)
+        if view is None:
+            content = b"[" + b",".join(self._items[i][0] for i in self._ids[skip:skip + limit]) + b"]"
+            view = (content, make_etag(content))
+            if len(self._views) >= self.max_views:
+                self._views.pop(next(iter(self._views)))
+            self._views[key] = view
+            self.stats["view_builds"] += 1
+        return view
+
+    def batch_view(self, ids: List[int], extra: Optional[Dict[int, bytes]] = None) -> bytes:
+        """指定順の {"items": [...], "missing_ids": [...]} のJSON（シリアライズ済みの要素を連結して作る）
+
+        extra にはスナップショットにない（他プロセスで追加されたばかりの）メンバーのJSONを渡す。
+        """
+        parts, missing_ids = [], []
+        for coworker_id in ids:
+            item = self._items.get(coworker_id)
+            content = item[0] if item is not None else (extra or {}).get(coworker_id)
+            if content is None:
+                missing_ids.append(coworker_id)
+            else:
+                parts.append(content)
+        return b'{"items":[' + b",".join(parts) + b'],"missing_ids":' + orjson.dumps(missing_ids) + b"}"
+
+    def item(self, coworker_id: int) -> Optional[Tuple[bytes, str]]:
+        return self._items.get(coworker_id)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "generation": self.generation,
+            "built_generation": self._built_generation,
+            "size": len(self._ids),
+            "views": len(self._views),
+        }
+
+coworker_directory = CoworkerDirectory(
+    refresh_seconds=float(os.getenv("COWORKER_DIRECTORY_REFRESH_SECONDS", "60"))
+)
+
+# ORM経由で社内メンバーが追加・更新・削除されたらスナップショットを作り直す
+@event.listens_for(Coworker, "after_insert")
+@event.listens_for(Coworker, "after_update")
+@event.listens_for(Coworker, "after_delete")
+def _invalidate_directory(mapper, connection, target):
+    coworker_directory.invalidate()
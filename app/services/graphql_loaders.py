@@ -0,0 +1,138 @@
+import asyncio
+from typing import Dict, List, Optional
+from graphene.utils.dataloader import DataLoader
+from sqlalchemy import select, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Contact, BusinessCard, Coworker, contact_person_table, contact_companions_table
+from app.utils.batch_lookup import order_by_ids
+from app.utils.principal_cache import Principal
+
+CONTACT_COLUMNS = list(Contact.__table__.c)
+BUSINESS_CARD_COLUMNS = list(BusinessCard.__table__.c)
+COWORKER_COLUMNS = list(Coworker.__table__.c)
+
+def _group(rows, key: str) -> Dict[int, list]:
+    grouped: Dict[int, list] = {}
+    for row in rows:
+        grouped.setdefault(getattr(row, key), []).append(row)
+    return grouped
+
+class RequestLoaders:
+    """GraphQLの1リクエスト分のDataLoader（リクエストごとに作り、キャッシュはリクエスト内だけで使う）
+
+    同じ階層の関連（例: 50件の面談記録それぞれの担当者）はキーをまとめて1回のIN句で読むため、
+    件数によらずSQLの発行回数は選択した関連の種類の数で決まる。
+    AsyncSession は同時に使えないので、SQLの実行はロックで1本ずつにする。
+    """
+
+    def __init__(self, db: AsyncSession, user: Principal):
+        self.db = db
+        self.user = user
+        self.statements = 0
+        self._lock = asyncio.Lock()
+        self.contact = DataLoader(self._load_contacts)
+        self.business_card = DataLoader(self._load_business_cards)
+        self.coworker = DataLoader(self._load_coworkers)
+        self.contact_persons = DataLoader(self._load_contact_persons)
+        self.contact_companions = DataLoader(self._load_contact_companions)
+        self._created_contacts: Dict[int, DataLoader] = {}
+
+    async def execute(self, statement) -> list:
+        async with self._lock:
+            self.statements += 1
+            result = await self.db.execute(statement)
+            return result.all()
+
+    def visible_contacts(self):
+        """閲覧できる面談記録の条件（Principal.can_view_contact と同じ規則をSQLで表したもの）"""
+        return or_(Contact.department_id == self.user.department_id, Contact.coworker_id == self.user.id)
+
+    # キー（id）ごとの1件
+
+    async def _load_by_ids(self, columns: list, id_column, ids: List[int]) -> list:
+        rows = await self.execute(select(*columns).where(id_column.in_(ids)))
+        found = {row.id: row for row in rows}
+        return [found.get(i) for i in ids]
+
+    async def _load_contacts(self, ids: List[int]) -> list:
+        return await self._load_by_ids(CONTACT_COLUMNS, Contact.id, ids)
+
+    async def _load_business_cards(self, ids: List[int]) -> list:
+        return await self._load_by_ids(BUSINESS_CARD_COLUMNS, BusinessCard.id, ids)
+
+    async def _load_coworkers(self, ids: List[int]) -> list:
+        return await self._load_by_ids(COWORKER_COLUMNS, Coworker.id, ids)
+
+    # 面談記録ごとの関連
+
+    async def _load_contact_persons(self, contact_ids: List[int]) -> list:
+        rows = await self.execute(
+            select(contact_person_table.c.contact_id, *BUSINESS_CARD_COLUMNS)
+            .join(BusinessCard, BusinessCard.id == contact_person_table.c.business_card_id)
+            .where(contact_person_table.c.contact_id.in_(contact_ids))
+            .order_by(BusinessCard.id)
+        )
+        grouped = _group(rows, "contact_id")
+        return [grouped.get(i, []) for i in contact_ids]
+
+    async def _load_contact_companions(self, contact_ids: List[int]) -> list:
+        rows = await self.execute(
+            select(contact_companions_table.c.contact_id, *COWORKER_COLUMNS)
+            .join(Coworker, Coworker.id == contact_companions_table.c.coworker_id)
+            .where(contact_companions_table.c.contact_id.in_(contact_ids))
+            .order_by(Coworker.id)
+        )
+        grouped = _group(rows, "contact_id")
+        return [grouped.get(i, []) for i in contact_ids]
+
+    def created_contacts(self, limit: int) -> DataLoader:
+        """社内メンバーごとの作成した面談記録（新しい順に limit 件、limit ごとに別のローダー）"""
+        loader = self._created_contacts.get(limit)
+        if loader is None:
+            async def load(coworker_ids: List[int]) -> list:
+                # メンバーごとの上位 limit 件をウィンドウ関数で1回のSQLで取得
+                rank = func.row_number().over(
+                    partition_by=Contact.coworker_id,
+                    order_by=(Contact.contact_date.desc().nulls_first(), Contact.id.desc())
+                ).label("rank")
+                ranked = select(*CONTACT_COLUMNS, rank).where(
+                    Contact.coworker_id.in_(coworker_ids), Contact.status != 9, self.visible_contacts()
+                ).subquery()
+                rows = await self.execute(
+                    select(*[ranked.c[column.name] for column in CONTACT_COLUMNS])
+                    .where(ranked.c.rank <= limit)
+                    .order_by(ranked.c.coworker_id, ranked.c.rank)
+                )
+                grouped = _group(rows, "coworker_id")
+                return [grouped.get(i, []) for i in coworker_ids]
+            loader = self._created_contacts[limit] = DataLoader(load)
+        return loader
+
+    # ルートの一覧
+
+    async def contacts(self, ids: Optional[List[int]], status: Optional[int], limit: int, offset: int) -> list:
+        """閲覧できる面談記録（ids 指定時はその順、なければ新しい順。破棄済みは status=9 指定時のみ）"""
+        query = select(*CONTACT_COLUMNS).where(self.visible_contacts())
+        if status is not None:
+            query = query.where(Contact.status == status)
+        else:
+            query = query.where(Contact.status != 9)
+        if ids is not None:
+            rows, _ = order_by_ids(ids, await self.execute(query.where(Contact.id.in_(ids))))
+            return rows[offset:offset + limit]
+        return await self.execute(
+            query.order_by(Contact.contact_date.desc().nulls_first(), Contact.id.desc()).offset(offset).limit(limit)
+        )
+
+    async def _list(self, columns: list, model, ids: Optional[List[int]], limit: int, offset: int) -> list:
+        query = select(*columns)
+        if ids is not None:
+            rows, _ = order_by_ids(ids, await self.execute(query.where(model.id.in_(ids))))
+            return rows[offset:offset + limit]
+        return await self.execute(query.order_by(model.id).offset(offset).limit(limit))
+
+    async def business_cards(self, ids: Optional[List[int]], limit: int, offset: int) -> list:
+        return await self._list(BUSINESS_CARD_COLUMNS, BusinessCard, ids, limit, offset)
+
+    async def coworkers(self, ids: Optional[List[int]], limit: int, offset: int) -> list:
+        return await self._list(COWORKER_COLUMNS, Coworker, ids, limit, offset)
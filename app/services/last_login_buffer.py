@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import update, bindparam, or_
+from app.database.connection import AsyncSessionLocal
+from app.models.models import AuthUser
+
+logger = logging.getLogger(__name__)
+
+class LastLoginBuffer:
+    """最終ログイン日時をプロセス内に溜め、定期的に1回のバッチUPDATEで書き込む（write-behind）
+
+    同じユーザーの複数回のログインは最新の日時1件にまとめる。
+    書き込みに失敗した分はバッファに戻して次回に再試行する。
+    """
+
+    def __init__(self, interval_seconds: float = 10, session_factory=AsyncSessionLocal):
+        self.interval_seconds = interval_seconds
+        self.session_factory = session_factory
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.stats = {"recorded": 0, "flushes": 0, "rows_written": 0, "failures": 0}
+
+    def record(self, auth_user_id: int, logged_in_at: Optional[datetime] = None):
+        """ログインを記録（DBには書かない）"""
+        self._merge(auth_user_id, logged_in_at or datetime.utcnow())
+        self.stats["recorded"] += 1
+
+    def _merge(self, auth_user_id: int, logged_in_at: datetime):
+        current = self._pending.get(auth_user_id)
+        if current is None or current < logged_in_at:
+            self._pending[auth_user_id] = logged_in_at
+
+    async def flush(self) -> int:
+        """溜まっている分をまとめて書き込み、書き込んだ件数を返す"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            table = AuthUser.__table__
+            stmt = update(table).where(
+                table.c.id == bindparam("uid"),
+                # 古い値で上書きしない
+                or_(table.c.last_login.is_(None), table.c.last_login < bindparam("ts"))
+            ).values(last_login=bindparam("ts"))
+            written = False
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(stmt, [{"uid": uid, "ts": ts} for uid, ts in batch.items()])
+                    await db.commit()
+                written = True
+            except Exception as e:
+                logger.warning(f"最終ログイン日時の書き込みに失敗（次回再試行）: {str(e)}")
+                self.stats["failures"] += 1
+                return 0
+            finally:
+                # 失敗・キャンセル時はバッファに戻す
+                if not written:
+                    for uid, ts in batch.items():
+                        self._merge(uid, ts)
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(batch)
+            return len(batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.flush()
+
+    def start(self):
+        """定期書き込みを開始（アプリ起動時）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """定期書き込みを止めて残りを書き込む（アプリ終了時）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def snapshot(self) -> dict:
+        """未書き込みの件数と書き込み回数"""
+        return {**self.stats, "pending": len(self._pending), "interval_seconds": self.interval_seconds}
+
+last_login_buffer = LastLoginBuffer(
+    interval_seconds=float(os.getenv("LAST_LOGIN_FLUSH_SECONDS", "10"))
+)
@@ -2,6 +2,12 @@ from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
 import logging
+import asyncio
+import re
+import anyio
+from typing import AsyncIterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.summary_cache import summary_cache, make_key
 
 load_dotenv()
 
@@ -14,55 +20,227 @@ client = AsyncOpenAI(
     api_key=os.getenv("OPENAI_API_KEY")
 )
 
-async def summarize_meeting_content(content: str) -> str:
-    """OpenAI APIを使用して面談内容を要約"""
-    if not content.strip():
-        return "要約する内容がありません。"
-    
-    try:
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """あなたは面談内容を要約する専門のアシスタントです。
+# 要約の設定（プロンプトを変更したら PROMPT_VERSION を上げてキャッシュを切り替える）
+SUMMARY_MODEL = "gpt-3.5-turbo"
+PROMPT_VERSION = "2"
+SUMMARY_SYSTEM_PROMPT = """あなたは面談内容を要約する専門のアシスタントです。
 以下の点に注意して要約を作成してください：
 1. 重要なポイントと決定事項を含める
 2. 簡潔で読みやすい日本語で作成する
 3. 箇条書きを使って整理する
 4. 300文字以内で要約する"""
-                },
-                {
-                    "role": "user", 
-                    "content": f"以下の面談内容を要約してください:\n\n{content}"
-                }
-            ],
-            max_tokens=600,
-            temperature=0.3,
-            top_p=1.0,
-            frequency_penalty=0.0,
-            presence_penalty=0.0
+SUMMARY_PARAMS = {
+    "max_tokens": 600,
+    "temperature": 0.3,
+    "top_p": 1.0,
+    "frequency_penalty": 0.0,
+    "presence_penalty": 0.0,
+}
+
+# 長文の分割要約（map-reduce）の設定
+SUMMARY_MAX_INPUT_CHARS = int(os.getenv("SUMMARY_MAX_INPUT_CHARS", "200000"))
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "6000"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+# 部分要約を繰り返す回数の上限（部分要約が縮まらない場合にAPIを呼び続けないため）
+SUMMARY_MAX_MAP_ROUNDS = int(os.getenv("SUMMARY_MAX_MAP_ROUNDS", "3"))
+MAP_PROMPT_VERSION = "map-1"
+MAP_SYSTEM_PROMPT = """あなたは長い面談記録の一部を要約する専門のアシスタントです。
+後で他の部分の要約と統合するため、以下の点に注意してください：
+1. 重要なポイント、決定事項、課題、数値、固有名詞を漏らさない
+2. 簡潔な日本語の箇条書きで作成する
+3. 400文字以内で要約する"""
+REDUCE_SYSTEM_PROMPT = """あなたは面談内容を要約する専門のアシスタントです。
+入力は1つの面談記録を複数のパートに分けて要約したものです。全体を1つの要約に統合してください：
+1. パート間の重複をまとめ、重要なポイントと決定事項を含める
+2. 簡潔で読みやすい日本語で作成する
+3. 箇条書きを使って整理する
+4. 300文字以内で要約する"""
+
+# 同時に実行する部分要約の上限（プロセス全体で共有）
+_map_semaphore = asyncio.Semaphore(SUMMARY_MAX_CONCURRENCY)
+
+class EmptySummaryError(Exception):
+    """OpenAI APIからの応答が空"""
+
+def _summary_messages(content: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": SUMMARY_SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": f"以下の面談内容を要約してください:\n\n{content}"
+        }
+    ]
+
+def _map_messages(chunk: str, part: int, total: int) -> list:
+    return [
+        {"role": "system", "content": MAP_SYSTEM_PROMPT},
+        {"role": "user", "content": f"以下は面談記録の{total}分割中{part}番目のパートです。要約してください:\n\n{chunk}"}
+    ]
+
+def _reduce_messages(partials: str) -> list:
+    return [
+        {"role": "system", "content": REDUCE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"以下のパートごとの要約を統合してください:\n\n{partials}"}
+    ]
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """段落→文の境界で分割し、max_chars以下のチャンクに詰める（境界がない長い文は文字数で切る）"""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        if not paragraph.strip():
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(("\n\n", paragraph))
+            continue
+        first = True
+        for sentence in re.split(r"(?<=[。！？!?．.\n])", paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(("\n\n" if first else "", sentence[:max_chars]))
+                sentence, first = sentence[max_chars:], False
+            if sentence:
+                pieces.append(("\n\n" if first else "", sentence))
+                first = False
+
+    chunks, current = [], ""
+    for separator, piece in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = current + separator + piece if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _chat(messages: list) -> str:
+    """チャット補完の呼び出し（失敗時は例外）"""
+    response = await client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=messages,
+        **SUMMARY_PARAMS
+    )
+
+    summary = response.choices[0].message.content
+    if not summary:
+        raise EmptySummaryError()
+    return summary.strip()
+
+async def _summarize_chunk(chunk: str, part: int, total: int) -> str:
+    """1チャンクの部分要約（セマフォで同時実行数を制限、部分要約もプロセス内でキャッシュ）"""
+    key = make_key(f"{part}/{total}\n{chunk}", SUMMARY_MODEL, MAP_PROMPT_VERSION, SUMMARY_PARAMS)
+
+    async def compute() -> str:
+        async with _map_semaphore:
+            return await _chat(_map_messages(chunk, part, total))
+
+    return await summary_cache.get_or_compute(key, compute)
+
+async def _reduce_input(content: str) -> str:
+    """長文をチャンクごとに並行要約し、統合用の入力がチャンク長に収まるまで繰り返す
+
+    SUMMARY_MAX_MAP_ROUNDS 回を超えるか、1回の部分要約で短くならなければ打ち切り、
+    統合用の入力をチャンク長で切り詰める（APIの呼び出し回数と入力長を有限に保つ）。
+    """
+    text = content
+    for _ in range(SUMMARY_MAX_MAP_ROUNDS):
+        if len(text) <= SUMMARY_CHUNK_CHARS:
+            return text
+        chunks = split_text(text, SUMMARY_CHUNK_CHARS)
+        partials = await asyncio.gather(*[
+            _summarize_chunk(chunk, i + 1, len(chunks)) for i, chunk in enumerate(chunks)
+        ])
+        reduced = "\n\n".join(f"【パート{i + 1}】\n{partial}" for i, partial in enumerate(partials))
+        if len(reduced) >= len(text):
+            logger.warning(f"部分要約で入力が短くならないため打ち切ります（{len(text)}文字 → {len(reduced)}文字）")
+            break
+        text = reduced
+    if len(text) > SUMMARY_CHUNK_CHARS:
+        logger.warning(f"統合用の入力を{SUMMARY_CHUNK_CHARS}文字に切り詰めます（{len(text)}文字）")
+        text = text[:SUMMARY_CHUNK_CHARS]
+    return text
+
+async def _final_messages(content: str) -> list:
+    """最終要約のメッセージ（長文は map 段の部分要約を統合する reduce 用）"""
+    if len(content) <= SUMMARY_CHUNK_CHARS:
+        return _summary_messages(content)
+    return _reduce_messages(await _reduce_input(content))
+
+async def _request_summary(content: str) -> str:
+    """要約APIの呼び出し（失敗時は例外）"""
+    return await _chat(await _final_messages(content))
+
+async def summarize_meeting_content(content: str, db: Optional[AsyncSession] = None) -> str:
+    """OpenAI APIを使用して面談内容を要約（同じ入力の要約はキャッシュから返す）"""
+    if not content.strip():
+        return "要約する内容がありません。"
+
+    key = make_key(content, SUMMARY_MODEL, PROMPT_VERSION, SUMMARY_PARAMS)
+    try:
+        # 成功した要約だけがキャッシュされる
+        return await summary_cache.get_or_compute(
+            key, lambda: _request_summary(content), db=db,
+            model=SUMMARY_MODEL, prompt_version=PROMPT_VERSION
         )
-        
-        summary = response.choices[0].message.content
-        if summary:
-            return summary.strip()
-        else:
-            logger.warning("OpenAI APIからの応答が空でした")
-            return "要約の生成に失敗しました（応答が空）。"
-            
+
+    except EmptySummaryError:
+        logger.warning("OpenAI APIからの応答が空でした")
+        return "要約の生成に失敗しました（応答が空）。"
+
     except Exception as e:
         logger.error(f"OpenAI API エラー: {str(e)}")
-        
-        # 具体的なエラーメッセージを返す
-        error_str = str(e).lower()
-        if "api !!key" in error_str or "un!!authorized" in error_str:
-            return "APIキーが設定されていないか無効です。"
-        elif "quota" in error_str or "billing" in error_str:
-            return "OpenAI APIの利用制限に達しています。"
-        elif "rate_limit" in error_str:
-            return "API利用頻度の制限に達しました。しばらく待ってから再度お試しください。"
-        elif "model" in error_str and "not found" in error_str:
-            return "指定されたAIモデルが見つかりません。"
-        else:
-            return f"要約の生成に失敗しました: {str(e)}"
\ No newline at end of file
+        return describe_error(e)
+
+def describe_error(e: Exception) -> str:
+    """APIエラーを利用者向けのメッセージに変換"""
+    # 具体的なエラーメッセージを返す
+    error_str = str(e).lower()
+    if "api !!key" in error_str or "un!!authorized" in error_str:
+        return "APIキーが設定されていないか無効です。"
+    elif "quota" in error_str or "billing" in error_str:
+        return "OpenAI APIの利用制限に達しています。"
+    elif "rate_limit" in error_str:
+        return "API利用頻度の制限に達しました。しばらく待ってから再度お試しください。"
+    elif "model" in error_str and "not found" in error_str:
+        return "指定されたAIモデルが見つかりません。"
+    else:
+        return f"要約の生成に失敗しました: {str(e)}"
+
+async def stream_meeting_summary(content: str, db: Optional[AsyncSession] = None) -> AsyncIterator[str]:
+    """要約をトークン単位で逐次返す（キャッシュ済みなら全文を1回で返す）
+
+    呼び出し側がイテレーションを中断（クライアント切断など）すると、
+    OpenAIとの接続を閉じて以降のトークン生成を打ち切る。
+    完走した要約だけをキャッシュに保存する。
+    """
+    key = make_key(content, SUMMARY_MODEL, PROMPT_VERSION, SUMMARY_PARAMS)
+    cached = await summary_cache.lookup(key, db)
+    if cached is not None:
+        yield cached
+        return
+
+    stream = await client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=await _final_messages(content),
+        stream=True,
+        **SUMMARY_PARAMS
+    )
+    parts = []
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                parts.append(token)
+                yield token
+    finally:
+        # 中断（キャンセル）時も含めて必ず接続を解放する
+        with anyio.CancelScope(shield=True):
+            await stream.response.aclose()
+
+    summary = "".join(parts).strip()
+    if not summary:
+        raise EmptySummaryError()
+    await summary_cache.store(key, summary, db, SUMMARY_MODEL, PROMPT_VERSION)
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Tuple
+from sqlalchemy import select, update, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+class RefreshTokenError(Exception):
+    """リフレッシュトークンが無効（存在しない・期限切れ・失効済み・再利用）"""
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+async def issue(db: AsyncSession, coworker_id: int, family_id: str = None) -> str:
+    """新しいリフレッシュトークンを発行（family_id 未指定なら新しい系列）。コミットは呼び出し側"""
+    token = secrets.token_urlsafe(32)
+    await db.execute(insert(RefreshToken).values(
+        token_hash=hash_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        coworker_id=coworker_id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+async def rotate(db: AsyncSession, token: str) -> Tuple[int, str]:
+    """トークンを使用済みにして同じ系列の新しいトークンを発行し (coworker_id, 新トークン) を返す
+
+    使用済みトークンが再び提示された場合は漏洩とみなし、系列全体を失効させる。
+    """
+    now = datetime.utcnow()
+    token_hash = hash_token(token)
+
+    # 未使用・有効なトークンだけを1文で使用済みにする（同時リクエストでも1回しか成功しない）
+    result = await db.execute(
+        update(RefreshToken).where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now
+        ).values(used_at=now).returning(RefreshToken.coworker_id, RefreshToken.family_id)
+    )
+    row = result.first()
+    if row is not None:
+        new_token = await issue(db, row.coworker_id, row.family_id)
+        await db.commit()
+        return row.coworker_id, new_token
+
+    existing = (await db.execute(
+        select(RefreshToken.family_id, RefreshToken.used_at).where(RefreshToken.token_hash == token_hash)
+    )).first()
+    if existing is not None and existing.used_at is not None:
+        logger.warning(f"リフレッシュトークンの再利用を検知したため系列を失効: family={existing.family_id}")
+        await revoke_family(db, existing.family_id)
+    raise RefreshTokenError()
+
+async def revoke_family(db: AsyncSession, family_id: str):
+    """系列の全トークンを失効（コミットまで行う）"""
+    await db.execute(
+        update(RefreshToken).where(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).values(revoked_at=datetime.utcnow())
+    )
+    await db.commit()
+
+async def revoke(db: AsyncSession, token: str):
+    """ログアウト: トークンの属する系列を失効（不明なトークンは無視）"""
+    family_id = await db.scalar(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_token(token))
+    )
+    if family_id is not None:
+        await revoke_family(db, family_id)
@@ -0,0 +1,215 @@
+import os
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+from sqlalchemy import Text, select, delete, insert, func, case, and_, or_, cast, literal, literal_column, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, TSQUERY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.models import Contact, ContactSearchGram, ContactSearchVector
+
+# 検索対象フィールドと重み（tsvectorの重みA〜Dにも対応させる）
+FIELD_WEIGHTS = {
+    "title": 4.0,
+    "person": 3.0,
+    "summary": 2.0,
+    "details": 1.0,
+}
+TSVECTOR_WEIGHTS = {
+    "title": "A",
+    "person": "B",
+    "summary": "C",
+    "details": "D",
+}
+
+def normalize(text: str) -> str:
+    """全角/半角・大文字/小文字の揺れを吸収"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+def _runs(text: str) -> List[str]:
+    """記号・空白で区切った文字列の連続部分を取り出す"""
+    runs, current = [], []
+    for ch in normalize(text):
+        if ch.isalnum():
+            current.append(ch)
+        elif current:
+            runs.append("".join(current))
+            current = []
+    if current:
+        runs.append("".join(current))
+    return runs
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """インデックス用の bi-gram 分割（各連続部分の末尾1文字も前方一致用に含める）"""
+    if not text:
+        return []
+    grams = []
+    for run in _runs(text):
+        grams.extend(run[i:i + 2] for i in range(len(run) - 1))
+        grams.append(run[-1])
+    return grams
+
+def query_terms(keyword: str) -> List[str]:
+    """検索語の分割（2文字以上は bi-gram、1文字の語はその1文字で前方一致）"""
+    terms = []
+    for run in _runs(keyword or ""):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return list(dict.fromkeys(terms))
+
+def build_document(values, persons, companions) -> Dict[str, List[str]]:
+    """面談記録の値（ORMオブジェクトまたは行）と担当者・同席者からフィールドごとの検索用テキストを組み立て"""
+    person_texts = []
+    for person in persons:
+        person_texts.extend([person.name, person.company])
+    for companion in companions:
+        person_texts.append(companion.name)
+    return {
+        "title": [values.title],
+        "person": person_texts,
+        "summary": [values.summary_text, values.location],
+        "details": [values.details],
+    }
+
+def _field_grams(document: Dict[str, List[str]]) -> Dict[str, Counter]:
+    return {
+        field: Counter(gram for text in texts for gram in tokenize(text))
+        for field, texts in document.items()
+    }
+
+class NgramTableBackend:
+    """n-gram 転置インデックスをテーブルに持つ汎用バックエンド（SQLite/PostgreSQL共通）"""
+    name = "ngram"
+
+    async def index(self, db: AsyncSession, contact_id: int, document: Dict[str, List[str]]):
+        await self.index_many(db, {contact_id: document})
+
+    async def index_many(self, db: AsyncSession, documents: Dict[int, Dict[str, List[str]]]):
+        await db.execute(delete(ContactSearchGram).where(ContactSearchGram.contact_id.in_(list(documents))))
+        rows = [
+            {"contact_id": contact_id, "field": field, "gram": gram, "tf": tf}
+            for contact_id, document in documents.items()
+            for field, counter in _field_grams(document).items()
+            for gram, tf in counter.items()
+        ]
+        if rows:
+            await db.execute(insert(ContactSearchGram), rows)
+
+    async def remove(self, db: AsyncSession, contact_id: int):
+        await db.execute(delete(ContactSearchGram).where(ContactSearchGram.contact_id == contact_id))
+
+    def ranked(self, terms: List[str]):
+        """(contact_id, score) のサブクエリ（全ての語を含む記録のみ）"""
+        conditions = [
+            ContactSearchGram.gram.like(f"{term}%") if len(term) == 1 else ContactSearchGram.gram == term
+            for term in terms
+        ]
+        weight = case(
+            *[(ContactSearchGram.field == field, w) for field, w in FIELD_WEIGHTS.items()],
+            else_=1.0
+        )
+        matched = [func.max(case((condition, 1), else_=0)) == 1 for condition in conditions]
+        return select(
+            ContactSearchGram.contact_id.label("contact_id"),
+            func.sum(ContactSearchGram.tf * weight).label("score")
+        ).where(or_(*conditions)).group_by(ContactSearchGram.contact_id).having(and_(*matched)).subquery()
+
+class TsvectorBackend:
+    """bi-gram を語彙とした tsvector + GIN インデックスの PostgreSQL バックエンド"""
+    name = "tsvector"
+
+    async def index(self, db: AsyncSession, contact_id: int, document: Dict[str, List[str]]):
+        await self.index_many(db, {contact_id: document})
+
+    async def index_many(self, db: AsyncSession, documents: Dict[int, Dict[str, List[str]]]):
+        # フィールドごとの bi-gram 配列をバインドし、重み付きtsvectorを連結（executemanyで一括投入）
+        # setweight の重みは "char" 型で、varchar のバインド値からは暗黙に変換されないためリテラルで埋め込む
+        vector = None
+        for field, weight in TSVECTOR_WEIGHTS.items():
+            part = func.setweight(func.array_to_tsvector(bindparam(field, type_=ARRAY(Text))), literal_column(f"'{weight}'::\"char\""))
+            vector = part if vector is None else vector.op("||")(part)
+        stmt = pg_insert(ContactSearchVector).values(contact_id=bindparam("cid"), vector=vector)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ContactSearchVector.contact_id],
+            set_={"vector": stmt.excluded.vector}
+        )
+        params = []
+        for contact_id, document in documents.items():
+            grams = _field_grams(document)
+            params.append({"cid": contact_id, **{field: sorted(grams.get(field, ())) for field in TSVECTOR_WEIGHTS}})
+        if params:
+            await db.execute(stmt, params)
+
+    async def remove(self, db: AsyncSession, contact_id: int):
+        await db.execute(delete(ContactSearchVector).where(ContactSearchVector.contact_id == contact_id))
+
+    def ranked(self, terms: List[str]):
+        """(contact_id, score) のサブクエリ（全ての語を含む記録のみ）"""
+        query = cast(
+            literal(" & ".join(f"'{term}':*" if len(term) == 1 else f"'{term}'" for term in terms), Text),
+            TSQUERY
+        )
+        return select(
+            ContactSearchVector.contact_id.label("contact_id"),
+            func.ts_rank(ContactSearchVector.vector, query).label("score")
+        ).where(ContactSearchVector.vector.op("@@")(query)).subquery()
+
+_BACKENDS = {
+    NgramTableBackend.name: NgramTableBackend(),
+    TsvectorBackend.name: TsvectorBackend(),
+}
+
+def get_backend(db: AsyncSession):
+    """SEARCH_BACKEND 環境変数（未指定時は接続先DBに応じて自動選択）"""
+    name = os.getenv("SEARCH_BACKEND")
+    if not name:
+        name = "tsvector" if db.get_bind().dialect.name == "postgresql" else "ngram"
+    return _BACKENDS[name]
+
+async def index_contact(db: AsyncSession, contact: Contact):
+    """面談記録の検索インデックスを更新（persons/companionsはロード済みであること）"""
+    await index_document(db, contact.id, build_document(contact, contact.persons, contact.companions))
+
+async def index_document(db: AsyncSession, contact_id: int, document: Dict[str, List[str]]):
+    """組み立て済みの文書で検索インデックスを更新（呼び出し側のトランザクション内で実行）"""
+    await get_backend(db).index(db, contact_id, document)
+
+async def index_documents(db: AsyncSession, documents: Dict[int, Dict[str, List[str]]]):
+    """複数の面談記録の検索インデックスをまとめて更新（一括登録用）"""
+    if documents:
+        await get_backend(db).index_many(db, documents)
+
+async def remove_contact(db: AsyncSession, contact_id: int):
+    """面談記録を検索インデックスから削除"""
+    await get_backend(db).remove(db, contact_id)
+
+def ranked_contacts(db: AsyncSession, keyword: str):
+    """キーワードに一致する (contact_id, score) のサブクエリ（検索語がなければNone）"""
+    terms = query_terms(keyword)
+    if not terms:
+        return None
+    return get_backend(db).ranked(terms)
+
+async def rebuild_index(db: AsyncSession, batch_size: int = 500) -> int:
+    """破棄済み以外の全面談記録の検索インデックスを再構築"""
+    count = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(Contact).options(
+                selectinload(Contact.persons),
+                selectinload(Contact.companions)
+            ).filter(Contact.id > last_id, Contact.status != 9).order_by(Contact.id).limit(batch_size)
+        )
+        contacts = result.scalars().all()
+        if not contacts:
+            break
+        for contact in contacts:
+            await index_contact(db, contact)
+        await db.commit()
+        count += len(contacts)
+        last_id = contacts[-1].id
+        db.expunge_all()
+    return count
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.connection import AsyncSessionLocal
+from app.models.models import BusinessCard, Coworker
+from app.schemas.schemas import BusinessCard as BusinessCardSchema, Coworker as CoworkerSchema
+
+logger = logging.getLogger(__name__)
+
+# 会社名の先頭に付く法人格（「株式会社テスト」を「テスト」でも引けるようにする）
+CORPORATE_PREFIXES = ("株式会社", "有限会社", "合同会社", "合資会社", "合名会社", "(株)", "(有)")
+# 前方一致の範囲の終端（全てのキーより大きい文字）
+_MAX_CHAR = "\U0010ffff"
+
+def normalize_key(text: str) -> str:
+    """全角/半角・大文字/小文字・カタカナ/ひらがなの揺れを吸収し、空白を除く"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(
+        chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch
+        for ch in text if not ch.isspace()
+    )
+
+def prefix_keys(text: Optional[str], strip_prefixes: Iterable[str] = ()) -> List[str]:
+    """1つの値から前方一致用のキーを作る（全体・空白区切りの各語・法人格を除いた名前）"""
+    if not text:
+        return []
+    keys = [normalize_key(text)]
+    words = unicodedata.normalize("NFKC", text).split()
+    if len(words) > 1:
+        keys.extend(normalize_key(word) for word in words)
+    for prefix in strip_prefixes:
+        normalized = normalize_key(prefix)
+        for key in list(keys):
+            if key.startswith(normalized) and len(key) > len(normalized):
+                keys.append(key[len(normalized):])
+    return list(dict.fromkeys(key for key in keys if key))
+
+class SuggestIndex:
+    """候補表示用のメモリ内前方一致インデックス
+
+    キーをソート済み配列に持ち、二分探索で前方一致の範囲を求める。
+    tier の小さいキー（名前）に一致したものを優先し、同じ tier 内ではキーの辞書順に返す。
+    """
+
+    def __init__(self, name: str, load: Callable, entry: Callable, refresh_seconds: float = 300, session_factory=AsyncSessionLocal):
+        self.name = name
+        self._load = load  # (db) -> ORMオブジェクトの一覧
+        self._entry = entry  # (obj) -> (id, 返却値, tierごとのキー一覧)
+        self.refresh_seconds = refresh_seconds
+        self.session_factory = session_factory
+        self._tiers: List[List[Tuple[str, int]]] = []
+        self._items: Dict[int, object] = {}
+        self._keys: Dict[int, List[Tuple[int, str]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._pending: Optional[list] = None  # 再読み込み中の add()（入れ替え後に適用し直す）
+        self._stale = False  # 再読み込み中に invalidate() された
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"queries": 0, "reloads": 0, "updates": 0, "replayed": 0, "failures": 0}
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        # 定期的な読み直しはバックグラウンドで行うので、動いていればリクエスト中には読み直さない
+        return self._task is not None or time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """未ロード（または invalidate 後）ならDBから全件を読み込む
+
+        start() していない場合は、更新間隔を過ぎたときもここで読み直す（他プロセスでの追加を取り込む）。
+        """
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            await self._reload(db)
+
+    async def _reload(self, db: AsyncSession):
+        """全件を読み込んで入れ替える（_lock を取って呼ぶ）
+
+        読み込み中の add() は記録しておき、入れ替えた後に適用し直す（読み込んだ行より新しい可能性があるため）。
+        """
+        self._pending, self._stale = [], False
+        try:
+            entries = [self._entry(obj) for obj in await self._load(db)]
+            tiers: List[List[Tuple[str, int]]] = []
+            items, keys = {}, {}
+            for item_id, item, tier_keys in entries:
+                items[item_id] = item
+                keys[item_id] = []
+                for tier, tier_values in enumerate(tier_keys):
+                    while len(tiers) <= tier:
+                        tiers.append([])
+                    for key in tier_values:
+                        tiers[tier].append((key, item_id))
+                        keys[item_id].append((tier, key))
+            for tier_entries in tiers:
+                tier_entries.sort()
+            self._tiers, self._items, self._keys = tiers, items, keys
+            for entry in self._pending:
+                self._apply(entry)
+            self.stats["replayed"] += len(self._pending)
+        finally:
+            self._pending = None
+        self._loaded_at = None if self._stale else time.monotonic()
+        self.stats["reloads"] += 1
+
+    def add(self, obj):
+        """作成・更新されたオブジェクトを反映（未ロードなら次回の全件読み込みに任せる）"""
+        entry = self._entry(obj)
+        if self._pending is not None:
+            self._pending.append(entry)
+        if self._loaded_at is None:
+            return
+        self._apply(entry)
+
+    def _apply(self, entry: tuple):
+        item_id, item, tier_keys = entry
+        self.remove(item_id)
+        self._items[item_id] = item
+        self._keys[item_id] = []
+        for tier, tier_values in enumerate(tier_keys):
+            while len(self._tiers) <= tier:
+                self._tiers.append([])
+            for key in tier_values:
+                insort(self._tiers[tier], (key, item_id))
+                self._keys[item_id].append((tier, key))
+        self.stats["updates"] += 1
+
+    async def refresh(self):
+        """DBから全件を読み直す（失敗したら今のインデックスのまま次回に再試行）"""
+        try:
+            async with self.session_factory() as db:
+                async with self._lock:
+                    await self._reload(db)
+        except Exception as e:
+            logger.warning(f"候補表示インデックス（{self.name}）の読み直しに失敗: {str(e)}")
+            self.stats["failures"] += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await self.refresh()
+
+    def start(self):
+        """定期的な読み直しをバックグラウンドで開始（アプリ起動時）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """定期的な読み直しを止める（アプリ終了時）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def invalidate(self):
+        """一括取り込みなどの後、次回の検索時に全件を読み直させる"""
+        self._loaded_at = None
+        if self._pending is not None:
+            # 読み込み中の結果には取り込み分が含まれていないかもしれないので、入れ替え後も読み直させる
+            self._stale = True
+
+    def remove(self, item_id: int):
+        for tier, key in self._keys.pop(item_id, []):
+            entries = self._tiers[tier]
+            i = bisect_left(entries, (key, item_id))
+            if i < len(entries) and entries[i] == (key, item_id):
+                del entries[i]
+        self._items.pop(item_id, None)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """前方一致する候補を上位 limit 件返す"""
+        self.stats["queries"] += 1
+        prefix = normalize_key(query)
+        if not prefix:
+            return []
+        found: Dict[int, None] = {}
+        for entries in self._tiers:
+            i = bisect_left(entries, (prefix,))
+            end = bisect_left(entries, (prefix + _MAX_CHAR,), i)
+            while i < end and len(found) < limit:
+                found.setdefault(entries[i][1])
+                i += 1
+            if len(found) >= limit:
+                break
+        return [self._items[item_id] for item_id in found]
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "items": len(self._items),
+            "keys": sum(len(entries) for entries in self._tiers),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+        }
+
+async def _load_business_cards(db: AsyncSession):
+    return (await db.execute(select(BusinessCard))).scalars().all()
+
+def _business_card_entry(card: BusinessCard):
+    return card.id, BusinessCardSchema.model_validate(card), [
+        prefix_keys(card.name) + prefix_keys(card.name_kana),
+        prefix_keys(card.company, CORPORATE_PREFIXES) + prefix_keys(card.company_kana, ("かぶしきがいしゃ", "ゆうげんがいしゃ")),
+    ]
+
+async def _load_coworkers(db: AsyncSession):
+    return (await db.execute(select(Coworker))).scalars().all()
+
+def _coworker_entry(coworker: Coworker):
+    return coworker.id, CoworkerSchema.model_validate(coworker), [
+        prefix_keys(coworker.name) + prefix_keys(coworker.name_kana),
+        prefix_keys(coworker.email.split("@")[0] if coworker.email else None),
+    ]
+
+SUGGEST_REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH_SECONDS", "300"))
+
+business_card_index = SuggestIndex("business_cards", _load_business_cards, _business_card_entry, SUGGEST_REFRESH_SECONDS)
+coworker_index = SuggestIndex("coworkers", _load_coworkers, _coworker_entry, SUGGEST_REFRESH_SECONDS)
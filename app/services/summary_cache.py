@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import SummaryCacheEntry
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """キャッシュキー用の正規化（全角/半角・改行コード・行末空白・連続空行の揺れを吸収）"""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line.rstrip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def make_key(text: str, model: str, prompt_version: str, params: dict) -> str:
+    """正規化した入力・モデル・プロンプト版・パラメータから内容アドレスのキーを作成"""
+    payload = json.dumps(
+        {"text": normalize_text(text), "model": model, "prompt_version": prompt_version, "params": params},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SummaryCache:
+    """プロセス内LRU（件数・TTLで追い出し）＋ DBテーブルの2段キャッシュ"""
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: dict = {}
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "inflight_joins": 0, "cancelled": 0, "evictions": 0}
+
+    def get_memory(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        summary, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.stats["evictions"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return summary
+
+    def put_memory(self, key: str, summary: str):
+        self._entries[key] = (summary, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get_db(self, db: AsyncSession, key: str) -> Optional[str]:
+        try:
+            return await db.scalar(select(SummaryCacheEntry.summary).where(SummaryCacheEntry.key == key))
+        except Exception as e:
+            logger.warning(f"要約キャッシュの読み込みに失敗: {str(e)}")
+            await db.rollback()
+            return None
+
+    async def put_db(self, db: AsyncSession, key: str, summary: str, model: str, prompt_version: str):
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        try:
+            await db.execute(insert(SummaryCacheEntry).values(
+                key=key, model=model, prompt_version=prompt_version, summary=summary
+            ).on_conflict_do_nothing(index_elements=[SummaryCacheEntry.key]))
+            await db.commit()
+        except Exception as e:
+            logger.warning(f"要約キャッシュの書き込みに失敗: {str(e)}")
+            await db.rollback()
+
+    async def lookup(self, key: str, db: Optional[AsyncSession] = None) -> Optional[str]:
+        """メモリ→DBの順に引く（DBで見つかればメモリにも載せる）"""
+        summary = self.get_memory(key)
+        if summary is not None:
+            self.stats["memory_hits"] += 1
+            return summary
+        
+        if db is not None:
+            summary = await self.get_db(db, key)
+            if summary is not None:
+                self.stats["db_hits"] += 1
+                self.put_memory(key, summary)
+                return summary
+        
+        self.stats["misses"] += 1
+        return None
+
+    async def store(self, key: str, summary: str, db: Optional[AsyncSession] = None, model: str = "", prompt_version: str = ""):
+        """両方の段に保存"""
+        self.put_memory(key, summary)
+        if db is not None:
+            await self.put_db(db, key, summary, model, prompt_version)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]], db: Optional[AsyncSession] = None, model: str = "", prompt_version: str = "") -> str:
+        """キャッシュを引き、なければ compute() の結果を両方の段に保存（同じキーの同時要求は1回にまとめる）
+
+        compute() は待っている要求が1つでも残っていれば続け、全員がキャンセル（クライアント切断など）されたら
+        打ち切ってAPIの消費を止める。完了した結果は最初の要求がキャンセルされていてもメモリに保存する。
+        """
+        summary = await self.lookup(key, db)
+        if summary is not None:
+            return summary
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["inflight_joins"] += 1
+        else:
+            inflight = self._start(key, compute)
+        summary = await self._wait(inflight)
+        
+        if db is not None:
+            await self.put_db(db, key, summary, model, prompt_version)
+        return summary
+
+    def _start(self, key: str, compute: Callable[[], Awaitable[str]]) -> list:
+        """compute() をタスクとして開始（[タスク, 待っている要求の数]）"""
+        inflight = [asyncio.ensure_future(compute()), 0]
+        self._inflight[key] = inflight
+
+        def finish(task: asyncio.Task):
+            if self._inflight.get(key) is inflight:
+                del self._inflight[key]
+            if not task.cancelled() and task.exception() is None:
+                self.put_memory(key, task.result())
+
+        inflight[0].add_done_callback(finish)
+        return inflight
+
+    async def _wait(self, inflight: list) -> str:
+        """1つの要求として結果を待つ（最後の要求がキャンセルされたら compute() も打ち切る）"""
+        task = inflight[0]
+        inflight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            inflight[1] -= 1
+            if inflight[1] == 0 and not task.done():
+                task.cancel()
+                self.stats["cancelled"] += 1
+
+    def snapshot(self) -> dict:
+        """ヒット/ミスのカウンタと現在の件数"""
+        lookups = self.stats["memory_hits"] + self.stats["db_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["db_hits"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+summary_cache = SummaryCache(
+    max_size=int(os.getenv("SUMMARY_CACHE_SIZE", "1000")),
+    ttl_seconds=float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "3600"))
+)
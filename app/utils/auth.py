@@ -4,22 +4,37 @@ from datetime import datetime, timedelta
 from typing import Optional
 import os
 from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.token_cache import token_cache
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# bcryptのコスト（calibrate_bcrypt.py で環境ごとに決める。変更するとログイン時に再ハッシュされる）
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """パスワードの検証"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
-def get_password_hash(password: str) -> str:
-    """パスワードのハッシュ化"""
-    salt = bcrypt.gensalt()
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """パスワードのハッシュ化（コスト未指定なら BCRYPT_ROUNDS）"""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+def hash_cost(hashed_password: str) -> Optional[int]:
+    """bcryptハッシュ（$2b$12$...）に埋め込まれたコスト"""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    """保存済みハッシュのコストが目標と異なるか"""
+    return hash_cost(hashed_password) != BCRYPT_ROUNDS
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """JWTアクセストークンの作成"""
     to_encode = data.copy()
@@ -32,9 +47,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
-    """JWTトークンの検証"""
+    """JWTトークンの検証（検証済みのトークンは exp までキャッシュから返す）"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    if token_cache.is_revoked(token):
+        return None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    token_cache.put(token, payload)
+    return payload
+
+async def revoke_token(db: AsyncSession, token: str):
+    """トークンを失効させる（以降の verify_token は None を返す。他のプロセスへは token_cache の同期間隔で伝わる）"""
+    try:
+        claims = jwt.get_unverified_claims(token)
+    except JWTError:
+        claims = {}
+    expires_at = claims.get("exp")
+    await token_cache.record_revocation(db, token, expires_at if isinstance(expires_at, (int, float)) else None)
@@ -0,0 +1,34 @@
+from typing import Callable, Dict, Iterable, List, Tuple, TypeVar
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+# 1リクエストで指定できるidの上限
+MAX_BATCH_IDS = 200
+
+def parse_ids(raw: str) -> List[int]:
+    """ids=3,1,2 のような指定を解釈（指定順を保ち、重複は除く、不正な場合は400）"""
+    try:
+        ids = [int(value) for value in raw.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids はカンマ区切りの整数で指定してください"
+        )
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids を指定してください"
+        )
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids は{MAX_BATCH_IDS}件以下にしてください"
+        )
+    return ids
+
+def order_by_ids(ids: List[int], rows: Iterable[T], key: Callable[[T], int] = lambda row: row.id) -> Tuple[List[T], List[int]]:
+    """IN句で取得した行を指定順に並べ直し、(行の一覧, 見つからなかったid) を返す"""
+    found: Dict[int, T] = {key(row): row for row in rows}
+    return [found[i] for i in ids if i in found], [i for i in ids if i not in found]
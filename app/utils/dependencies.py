@@ -1,18 +1,22 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.connection import get_db
 from app.models.models import Coworker
 from app.utils.auth import verify_token
+from app.utils.principal_cache import Principal, principal_cache
+from app.utils.token_cache import token_cache
 
 security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Coworker:
-    """現在のログインユーザーを取得"""
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """現在のログインユーザーを取得（社内メンバーの行は短時間キャッシュし、毎回のDB参照を省く）"""
     token = credentials.credentials
+    # 他のワーカー・インスタンスでのログアウト（トークンの失効）を一定間隔で取り込む
+    await token_cache.sync_revocations(db)
     payload = verify_token(token)
     
     if payload is None:
@@ -30,7 +34,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(Coworker).filter(Coworker.id == int(user_id)).first()
+    principal = principal_cache.get(str(user_id))
+    if principal is not None:
+        return principal
+    
+    user = await db.get(Coworker, int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,4 +46,6 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user
\ No newline at end of file
+    principal = Principal.from_coworker(user)
+    principal_cache.put(str(user_id), principal)
+    return principal
\ No newline at end of file
@@ -0,0 +1,122 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from graphql import (
+    DocumentNode, FieldNode, FragmentDefinitionNode, FragmentSpreadNode, GraphQLError, GraphQLSchema,
+    InlineFragmentNode, OperationDefinitionNode, OperationType, SelectionSetNode, Undefined,
+    get_named_type, get_nullable_type, is_list_type, value_from_ast
+)
+
+class QueryLimits:
+    """GraphQLクエリの深さと複雑度の上限（実行前にドキュメントを走査して判定）
+
+    複雑度は解決されるオブジェクト数の見積もり。リストのフィールドは limit 引数（ids 指定時はその件数との小さい方、
+    どちらもなければ default_list_size 件）を掛けて数える。イントロスペクション（__で始まるフィールド）は数えない。
+    """
+
+    def __init__(self, max_depth: int = 6, max_complexity: int = 5000, max_list_size: int = 100, default_list_size: int = 10):
+        self.max_depth = max_depth
+        self.max_complexity = max_complexity
+        self.max_list_size = max_list_size
+        self.default_list_size = default_list_size
+        self.stats = {"checked": 0, "rejected_depth": 0, "rejected_complexity": 0, "rejected_list_size": 0}
+
+    def check(self, schema: GraphQLSchema, document: DocumentNode, variables: Optional[dict] = None) -> List[GraphQLError]:
+        """上限を超えていればエラーの一覧を返す（検証済みのドキュメントに対して呼ぶこと）"""
+        self.stats["checked"] += 1
+        fragments = {
+            definition.name.value: definition
+            for definition in document.definitions if isinstance(definition, FragmentDefinitionNode)
+        }
+        root_types = {
+            OperationType.QUERY: schema.query_type,
+            OperationType.MUTATION: schema.mutation_type,
+            OperationType.SUBSCRIPTION: schema.subscription_type,
+        }
+        errors = []
+        for operation in document.definitions:
+            if not isinstance(operation, OperationDefinitionNode) or root_types.get(operation.operation) is None:
+                continue
+            try:
+                depth, complexity = self._measure(
+                    schema, operation.selection_set, root_types[operation.operation], 0, fragments, variables or {}
+                )
+            except GraphQLError as e:
+                self.stats["rejected_list_size"] += 1
+                errors.append(e)
+                continue
+            if depth > self.max_depth:
+                self.stats["rejected_depth"] += 1
+                errors.append(GraphQLError(f"クエリの階層が深すぎます（{depth}階層、上限は{self.max_depth}）", operation))
+            elif complexity > self.max_complexity:
+                self.stats["rejected_complexity"] += 1
+                errors.append(GraphQLError(f"クエリが大きすぎます（複雑度{complexity}、上限は{self.max_complexity}）", operation))
+        return errors
+
+    def _measure(self, schema: GraphQLSchema, selection_set: SelectionSetNode, parent_type, depth: int, fragments: Dict[str, FragmentDefinitionNode], variables: dict) -> Tuple[int, int]:
+        """選択セットの (最大の深さ, 複雑度)"""
+        max_depth, complexity = depth, 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                field = getattr(parent_type, "fields", {}).get(name)
+                if name.startswith("__") or field is None:
+                    continue
+                max_depth = max(max_depth, depth + 1)
+                if selection.selection_set is None:
+                    continue
+                size = self._list_size(selection, field, variables) if is_list_type(get_nullable_type(field.type)) else 1
+                child_depth, child_complexity = self._measure(
+                    schema, selection.selection_set, get_named_type(field.type), depth + 1, fragments, variables
+                )
+                max_depth = max(max_depth, child_depth)
+                complexity += size * (1 + child_complexity)
+                continue
+            if isinstance(selection, InlineFragmentNode):
+                fragment = selection
+            elif isinstance(selection, FragmentSpreadNode) and selection.name.value in fragments:
+                fragment = fragments[selection.name.value]
+            else:
+                continue
+            fragment_type = schema.get_type(fragment.type_condition.name.value) if fragment.type_condition else parent_type
+            child_depth, child_complexity = self._measure(schema, fragment.selection_set, fragment_type, depth, fragments, variables)
+            max_depth = max(max_depth, child_depth)
+            complexity += child_complexity
+        return max_depth, complexity
+
+    def _list_size(self, node: FieldNode, field, variables: dict) -> int:
+        """リストのフィールドが返す件数の上限（limit が上限を超えていればエラー）"""
+        arguments = {argument.name.value: argument.value for argument in node.arguments}
+        size = self.default_list_size
+        if "limit" in field.args:
+            default = field.args["limit"].default_value
+            size = default if isinstance(default, int) else size
+            if "limit" in arguments:
+                # 省略された変数は既定値のまま、null は既定値に置き換えず拒否する（LIMIT なしで実行させない）
+                value = value_from_ast(arguments["limit"], field.args["limit"].type, variables)
+                if value is not Undefined:
+                    if not isinstance(value, int):
+                        raise GraphQLError(f"limit は0以上{self.max_list_size}以下にしてください", node)
+                    size = value
+        if size > self.max_list_size or size < 0:
+            raise GraphQLError(f"limit は0以上{self.max_list_size}以下にしてください", node)
+        if "ids" in arguments and "ids" in field.args:
+            ids = value_from_ast(arguments["ids"], field.args["ids"].type, variables)
+            if isinstance(ids, list):
+                if len(ids) > self.max_list_size:
+                    raise GraphQLError(f"ids は{self.max_list_size}件以下にしてください", node)
+                size = min(size, len(ids))
+        return size
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "max_depth": self.max_depth,
+            "max_complexity": self.max_complexity,
+            "max_list_size": self.max_list_size,
+        }
+
+query_limits = QueryLimits(
+    max_depth=int(os.getenv("GRAPHQL_MAX_DEPTH", "6")),
+    max_complexity=int(os.getenv("GRAPHQL_MAX_COMPLEXITY", "5000")),
+    max_list_size=int(os.getenv("GRAPHQL_MAX_LIST_SIZE", "100"))
+)
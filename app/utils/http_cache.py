@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+from fastapi import Request, Response
+
+def make_etag(content: bytes) -> str:
+    """内容から作る強いETag（プロセスが違っても同じ内容なら同じ値）"""
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+def version_etag(kind: str, row_id: int, version: int, related_versions: Iterable[int] = ()) -> str:
+    """行のバージョン（本文に関連行を含む場合はそのバージョンも）から作る強いETag"""
+    suffix = "".join(f".{related}" for related in related_versions)
+    return f'"{kind}-{row_id}-v{version}{suffix}"'
+
+def http_date(value: datetime) -> str:
+    """UTCのnaive datetimeをHTTP日付（Last-Modified）に変換"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match に ETag が含まれるか（* も一致とみなす）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """条件付きGETの判定（If-None-Match があればそれを優先、なければ If-Modified-Since）"""
+    if request.headers.get("if-none-match"):
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if not since or last_modified is None:
+        return False
+    try:
+        since_at = parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP日付は秒単位
+    return last_modified.replace(microsecond=0) <= since_at
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+def cached_json_response(request: Request, content: bytes, etag: Optional[str] = None, headers: Optional[dict] = None) -> Response:
+    """シリアライズ済みのJSONを返す（If-None-Match が一致すれば本文なしの304）"""
+    etag = etag or make_etag(content)
+    headers = {**validator_headers(etag), **(headers or {})}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,201 @@
+import logging
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import Request
+from sqlalchemy import case, delete, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.database.connection import AsyncSessionLocal
+from app.models.models import LoginThrottleBucket
+
+logger = logging.getLogger(__name__)
+
+class BucketStore(ABC):
+    """トークンバケットの保存先のインターフェース
+
+    プロセス内で完結する MemoryBucketStore と、複数ワーカー・複数インスタンスで制限を共有する
+    DatabaseBucketStore がある。take() はバケットの補充と1トークンの消費を原子的に行うこと。
+    """
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        """1トークン消費を試み (許可したか, 拒否時に次のトークンまでの秒数) を返す"""
+
+    @abstractmethod
+    async def peek(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        """トークンを消費せずに (1トークン以上残っているか, 不足時に次のトークンまでの秒数) を返す"""
+
+def _retry_after(tokens: float, refill_per_second: float) -> Tuple[bool, float]:
+    if tokens >= 1:
+        return True, 0.0
+    return False, (1 - tokens) / refill_per_second
+
+class MemoryBucketStore(BucketStore):
+    """プロセス内のトークンバケット（件数の上限を超えたら古いキーから捨てる）"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [capacity, now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            tokens, updated = bucket
+            bucket[0] = min(capacity, tokens + (now - updated) * refill_per_second)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, 0.0
+        return False, (1 - bucket[0]) / refill_per_second
+
+    async def peek(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return True, 0.0
+        tokens, updated = bucket
+        return _retry_after(min(capacity, tokens + (time.monotonic() - updated) * refill_per_second), refill_per_second)
+
+class DatabaseBucketStore(BucketStore):
+    """DBの login_throttle_buckets テーブルに保存するトークンバケット（全ワーカー・インスタンスで共有）
+
+    補充と消費は1回の UPSERT ... RETURNING で行うため、同じキーへの同時アクセスでも原子的に判定される。
+    時刻は各インスタンスのUNIX時刻を使う。prune_every 回ごとに、満タンに戻ったとみなせる古い行を削除する。
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, idle_seconds: float = 86400, prune_every: int = 1000):
+        self.session_factory = session_factory
+        self.idle_seconds = idle_seconds
+        self.prune_every = prune_every
+        self._takes = 0
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        now = time.time()
+        table = LoginThrottleBucket.__table__
+        elapsed = case((table.c.updated_at < now, now - table.c.updated_at), else_=0)
+        refilled = table.c.tokens + elapsed * refill_per_second
+        refilled = case((refilled > capacity, capacity), else_=refilled)
+        async with self.session_factory() as db:
+            insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(LoginThrottleBucket).values(key=key, tokens=capacity - 1, updated_at=now, granted=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LoginThrottleBucket.key],
+                set_={
+                    "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                    "granted": case((refilled >= 1, literal(1)), else_=literal(0)),
+                    "updated_at": now,
+                }
+            ).returning(LoginThrottleBucket.tokens, LoginThrottleBucket.granted)
+            row = (await db.execute(stmt)).one()
+            await db.commit()
+
+            self._takes += 1
+            if self._takes % self.prune_every == 0:
+                await self.prune(db, now)
+        if row.granted:
+            return True, 0.0
+        return False, (1 - row.tokens) / refill_per_second
+
+    async def peek(self, key: str, capacity: float, refill_per_second: float) -> Tuple[bool, float]:
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(LoginThrottleBucket.tokens, LoginThrottleBucket.updated_at).where(LoginThrottleBucket.key == key)
+            )).first()
+        if row is None:
+            return True, 0.0
+        elapsed = max(0.0, time.time() - row.updated_at)
+        return _retry_after(min(capacity, row.tokens + elapsed * refill_per_second), refill_per_second)
+
+    async def prune(self, db, now: float):
+        """長く使われていないバケットを削除（失敗してもログインは止めない）"""
+        try:
+            await db.execute(delete(LoginThrottleBucket).where(LoginThrottleBucket.updated_at < now - self.idle_seconds))
+            await db.commit()
+        except Exception as e:
+            logger.warning(f"ログイン試行制限のバケット削除に失敗: {str(e)}")
+            await db.rollback()
+
+class LoginThrottle:
+    """ログイン試行をユーザーIDとクライアントIPごとのトークンバケットで制限（bcrypt の前に判定）
+
+    ユーザーのバケットは試行ごとに消費する。IPのバケットは判定だけを検証前に行い、消費するのは
+    ログインに失敗したときだけ（record_failure）なので、オフィスのNATなどで多数の利用者が1つのIPを
+    共有していても、正しいパスワードでのログインは制限されない。
+    """
+
+    def __init__(self, store: BucketStore, user_burst: int, user_per_minute: float, ip_burst: int, ip_per_minute: float):
+        self.store = store
+        self.limits = {
+            "user": (user_burst, user_per_minute / 60),
+            "ip": (ip_burst, ip_per_minute / 60),
+        }
+        self.stats = {"allowed": 0, "failures": 0, "throttled_user": 0, "throttled_ip": 0}
+
+    async def check(self, user_id: int, client_ip: Optional[str]) -> Optional[int]:
+        """許可なら None、制限中なら Retry-After の秒数を返す
+
+        IPを先に判定し、IPで拒否した試行ではユーザーのトークンを消費しない
+        （制限中のIPからの試行で他人のアカウントをロックアウトさせない）。
+        """
+        if client_ip:
+            capacity, refill = self.limits["ip"]
+            allowed, retry_after = await self.store.peek(f"ip:{client_ip}", capacity, refill)
+            if not allowed:
+                self.stats["throttled_ip"] += 1
+                return max(1, math.ceil(retry_after))
+        capacity, refill = self.limits["user"]
+        allowed, retry_after = await self.store.take(f"user:{user_id}", capacity, refill)
+        if not allowed:
+            self.stats["throttled_user"] += 1
+            return max(1, math.ceil(retry_after))
+        self.stats["allowed"] += 1
+        return None
+
+    async def record_failure(self, client_ip: Optional[str]):
+        """ログインに失敗した試行の分だけIPのトークンを消費する"""
+        if not client_ip:
+            return
+        capacity, refill = self.limits["ip"]
+        await self.store.take(f"ip:{client_ip}", capacity, refill)
+        self.stats["failures"] += 1
+
+    def snapshot(self) -> dict:
+        """許可・制限の件数と設定値"""
+        return {
+            **self.stats,
+            "store": type(self.store).__name__,
+            "limits": {kind: {"burst": capacity, "per_minute": refill * 60} for kind, (capacity, refill) in self.limits.items()},
+        }
+
+# プロキシ（Render等）の背後では、プロキシが末尾に追加した X-Forwarded-For をクライアントIPとみなす（render.yaml で有効化）。
+# uvicorn の --forwarded-allow-ips='*' は先頭（クライアントが偽装できる値）を使うため、ここでは使わない
+TRUST_PROXY = os.getenv("LOGIN_THROTTLE_TRUST_PROXY", "").lower() in ("1", "true", "yes")
+
+def client_ip(request: Request) -> Optional[str]:
+    if TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else None
+
+# memory: プロセスごと（ワーカーが1つのとき） / database: DBで全ワーカー・インスタンス共有
+LOGIN_THROTTLE_STORE = os.getenv("LOGIN_THROTTLE_STORE", "memory")
+
+login_throttle = LoginThrottle(
+    store=DatabaseBucketStore() if LOGIN_THROTTLE_STORE == "database" else MemoryBucketStore(),
+    user_burst=int(os.getenv("LOGIN_THROTTLE_USER_BURST", "5")),
+    user_per_minute=float(os.getenv("LOGIN_THROTTLE_USER_PER_MINUTE", "5")),
+    ip_burst=int(os.getenv("LOGIN_THROTTLE_IP_BURST", "100")),
+    ip_per_minute=float(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", "60"))
+)
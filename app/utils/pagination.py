@@ -0,0 +1,168 @@
+import base64
+import json
+import logging
+from datetime import date
+from typing import NamedTuple, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, tuple_, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# カーソル（キーセット）ページング用の次ページカーソルを返すヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# 一覧の件数（total_mode指定時）と次ページの有無を返すヘッダー
+TOTAL_COUNT_HEADER = "X-Total-Count"
+HAS_MORE_HEADER = "X-Has-More"
+
+def encode_cursor(values: dict) -> str:
+    """カーソル値を不透明な文字列にエンコード"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """カーソル文字列をデコード（不正な場合は400）"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, dict) or not isinstance(values.get("id"), int):
+            raise ValueError("id がありません")
+        return values
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無効なカーソルです"
+        )
+
+def id_cursor_filter(id_column, cursor: str):
+    """id昇順のキーセット条件"""
+    values = decode_cursor(cursor)
+    return id_column > values["id"]
+
+def next_id_cursor(rows: list, limit: int) -> Optional[str]:
+    """id昇順の次ページカーソル（最終ページならNone）"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor({"id": rows[-1].id})
+
+def date_id_cursor_filter(date_column, id_column, cursor: str):
+    """(日付 DESC NULLS FIRST, id DESC) 順のキーセット条件（PostgreSQLのDESC既定順と同じ）"""
+    values = decode_cursor(cursor)
+    last_id = values["id"]
+    if values.get("d") is None:
+        return or_(
+            and_(date_column.is_(None), id_column < last_id),
+            date_column.isnot(None)
+        )
+    try:
+        last_date = date.fromisoformat(values["d"])
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無効なカーソルです"
+        )
+    # 日付が入った行だけが残るので (日付, id) の複合インデックスを逆順に範囲走査できる
+    return tuple_(date_column, id_column) < tuple_(last_date, last_id)
+
+def next_date_id_cursor(rows: list, limit: int, date_attr: str) -> Optional[str]:
+    """(日付, id) 順の次ページカーソル（最終ページならNone）"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    last_date = getattr(last, date_attr)
+    return encode_cursor({"d": last_date.isoformat() if last_date else None, "id": last.id})
+
+def score_id_cursor_filter(score_column, id_column, cursor: str):
+    """(スコア DESC, id DESC) 順のキーセット条件"""
+    values = decode_cursor(cursor)
+    if not isinstance(values.get("s"), (int, float)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無効なカーソルです"
+        )
+    return tuple_(score_column, id_column) < tuple_(values["s"], values["id"])
+
+def next_score_id_cursor(rows: list, limit: int) -> Optional[str]:
+    """(オブジェクト, スコア) 行の次ページカーソル（最終ページならNone）"""
+    if not rows or len(rows) < limit:
+        return None
+    last, score = rows[-1]
+    return encode_cursor({"s": float(score), "id": last.id})
+
+class Page(NamedTuple):
+    items: list
+    total: Optional[int]  # total_mode="none" のときは None
+    has_more: bool
+
+async def estimate_count(db: AsyncSession, query) -> int:
+    """実行計画の推定行数（PostgreSQL以外は正確な件数）"""
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        try:
+            # バインドパラメータはそのままドライバに渡す（検索語をSQL文字列に埋め込まない）
+            compiled = query.compile(dialect=bind.dialect)
+            params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+            # 失敗してもトランザクションを壊さないようセーブポイント内で実行
+            async with db.begin_nested():
+                conn = await db.connection()
+                result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+                plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            logger.warning(f"推定件数の取得に失敗したため正確な件数を数えます: {str(e)}")
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+async def fetch_page(db: AsyncSession, query, order_by: list, page: int, per_page: int, cursor_filter=None, total_mode: str = "exact") -> Page:
+    """絞り込み済みのクエリから1ページ分を取得（per_page + 1 件読んで次ページの有無を判定）
+
+    total_mode:
+      exact     … 件数を同じSQL文の中で数える（OFFSET時はウィンドウ関数 count(*) OVER ()、カーソル時はスカラーサブクエリ）
+      estimated … 実行計画の推定行数（取得結果から確定できる場合は正確な値）
+      none      … 件数を数えない（has_more のみ）
+    
+    クエリに列を追加している場合（検索のスコアなど）は、items を (エンティティ, 追加した列...) の行のまま返す。
+    """
+    width = len(query.column_descriptions)
+    paged = query
+    if total_mode == "exact":
+        if cursor_filter is None:
+            total_column = func.count().over()
+        else:
+            # カーソル条件で絞る前の件数が必要なので、ウィンドウではなく同じ文の中のサブクエリで数える
+            total_column = select(func.count()).select_from(query.subquery()).scalar_subquery()
+        paged = paged.add_columns(total_column.label("total"))
+    
+    paged = paged.order_by(*order_by)
+    offset = 0
+    if cursor_filter is not None:
+        paged = paged.filter(cursor_filter)
+    else:
+        offset = (page - 1) * per_page
+        paged = paged.offset(offset)
+    
+    result = await db.execute(paged.limit(per_page + 1))
+    rows = result.unique().all()
+    total = rows[0].total if total_mode == "exact" and rows else None
+    items = [row[0] if width == 1 else tuple(row[:width]) for row in rows]
+    
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    # 取得結果から分かる件数の下限（OFFSETページングで範囲内のページの場合のみ）
+    known = None
+    if cursor_filter is None and (items or offset == 0):
+        known = offset + len(items) + (1 if has_more else 0)
+    
+    if total_mode == "exact" and total is None:
+        # 範囲外のページでは行がないため件数だけ数える
+        total = 0 if known == 0 else await db.scalar(select(func.count()).select_from(query.subquery()))
+    elif total_mode == "estimated":
+        if known is not None and not has_more:
+            total = known
+        else:
+            total = max(await estimate_count(db, query), known or 0)
+    return Page(items=items, total=total, has_more=has_more)
+
+def total_pages(total: Optional[int], per_page: int) -> Optional[int]:
+    return None if total is None else (total + per_page - 1) // per_page
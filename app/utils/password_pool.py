@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.auth import verify_password, get_password_hash
+
+class PasswordPoolBusyError(Exception):
+    """ハッシュ処理の待ち行列が上限に達している"""
+
+class PasswordHasherPool:
+    """bcrypt のハッシュ化・検証をイベントループ外の専用スレッドプールで実行
+
+    bcrypt は計算中に GIL を解放するため、スレッド数（コア数）まで並列に処理できる。
+    実行中＋待ちが max_workers + max_queue に達した要求は PasswordPoolBusyError で即座に拒否する。
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, latency_window: int = 256):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()  # ワーカースレッドから更新する値の保護
+        self._latencies = deque(maxlen=latency_window)
+        self._waits = deque(maxlen=latency_window)
+        self.stats = {"completed": 0, "rejected": 0}
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise PasswordPoolBusyError()
+
+        self._pending += 1
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._waits.append(started - submitted)
+                    self._latencies.append(finished - started)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            self._pending -= 1
+            self.stats["completed"] += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """パスワードの検証（非同期）"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """パスワードのハッシュ化（非同期）"""
+        return await self._run(get_password_hash, password)
+
+    def snapshot(self) -> dict:
+        """待ち行列の深さとハッシュ処理時間の統計（ミリ秒）"""
+        def summarize(samples):
+            if not samples:
+                return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+            ordered = sorted(samples)
+            return {
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queue_depth": max(self._pending - self._running, 0),
+            **self.stats,
+            "latency": summarize(self._latencies),
+            "queue_wait": summarize(self._waits),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_pool = PasswordHasherPool(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2))),
+    max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+)
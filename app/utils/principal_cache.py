@@ -0,0 +1,83 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from app.models.models import Coworker
+
+@dataclass(frozen=True)
+class Principal:
+    """認証済みユーザーの軽量な不変オブジェクト（DBセッションに紐づかない）"""
+    id: int
+    department_id: Optional[int]
+    name: str
+
+    @classmethod
+    def from_coworker(cls, coworker: Coworker) -> "Principal":
+        return cls(id=coworker.id, department_id=coworker.department_id, name=coworker.name)
+
+    def can_view_contact(self, contact) -> bool:
+        """部署単位での面談記録の閲覧権限（自部署のもの、または自分が作成したもの）"""
+        return contact.department_id == self.department_id or contact.coworker_id == self.id
+
+class PrincipalCache:
+    """トークンの subject をキーにした Principal のプロセス内LRU（件数・TTLで追い出し）"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, subject: str) -> Optional[Principal]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        principal, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[subject]
+            self.stats["evictions"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.stats["hits"] += 1
+        return principal
+
+    def put(self, subject: str, principal: Principal):
+        self._entries[subject] = (principal, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, coworker_id: int):
+        """社内メンバーの変更時に該当エントリを破棄"""
+        if self._entries.pop(str(coworker_id), None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """ヒット/ミスのカウンタと現在の件数"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+principal_cache = PrincipalCache(
+    max_size=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+)
+
+# ORM経由で社内メンバーが更新・削除されたらキャッシュを破棄（別プロセスからの変更はTTLで反映）
+@event.listens_for(Coworker, "after_update")
+@event.listens_for(Coworker, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import RevokedAccessToken
+
+logger = logging.getLogger(__name__)
+
+def token_digest(token: str) -> bytes:
+    """キャッシュキー用のトークンのダイジェスト（トークン文字列そのものは保持しない）"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+class TokenCache:
+    """署名検証済みのJWTクレームのプロセス内LRU（トークンの exp で失効、失効リストで即時破棄）
+
+    失効は revoked_access_tokens テーブルで全ワーカー・インスタンスと共有する。
+    各プロセスは sync_seconds ごとに新しい失効を取り込むため、別プロセスでのログアウトが反映されるまで
+    最大 sync_seconds 秒かかる（ログアウトしたプロセスでは即時）。
+    """
+
+    # 取り込み済みの失効の時刻から、インスタンス間の時計のずれとして遡って読み直す秒数
+    CLOCK_SKEW_SECONDS = 60
+    # プロセス内の失効リストから exp を過ぎたものを消す間隔（秒）
+    PRUNE_INTERVAL_SECONDS = 60
+
+    def __init__(self, max_size: int = 10000, sync_seconds: float = 5):
+        self.max_size = max_size
+        self.sync_seconds = sync_seconds
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._revoked: dict = {}  # ダイジェスト -> exp（exp を過ぎたら失効リストからも消す）
+        self._synced_at: Optional[float] = None  # 最後に失効を取り込んだ時刻（monotonic）
+        self._synced_through = 0.0  # 取り込み済みの失効の revoked_at の最大値
+        self._pruned_at = time.monotonic()
+        self.stats = {"hits": 0, "misses": 0, "revocations": 0, "evictions": 0, "syncs": 0, "sync_errors": 0}
+
+    def get(self, token: str) -> Optional[dict]:
+        if not self.max_size:
+            return None
+        self._maybe_prune_revoked()
+        digest = token_digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            self.stats["evictions"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.stats["hits"] += 1
+        return dict(claims)
+
+    def put(self, token: str, claims: dict):
+        """exp のあるトークンだけをキャッシュ（失効済みのものは載せない）"""
+        expires_at = claims.get("exp")
+        if not self.max_size or not isinstance(expires_at, (int, float)):
+            return
+        self._maybe_prune_revoked()
+        digest = token_digest(token)
+        if digest in self._revoked:
+            return
+        self._entries[digest] = (dict(claims), expires_at)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def is_revoked(self, token: str) -> bool:
+        return token_digest(token) in self._revoked
+
+    def revoke(self, token: str, expires_at: Optional[float] = None) -> float:
+        """トークンをこのプロセスの失効リストに追加してキャッシュからも破棄し、失効を保持する期限（exp）を返す"""
+        digest = token_digest(token)
+        entry = self._entries.get(digest)
+        if expires_at is None:
+            expires_at = entry[1] if entry else time.time() + 24 * 60 * 60
+        self._mark_revoked(digest, expires_at)
+        self._prune_revoked()
+        return expires_at
+
+    def _mark_revoked(self, digest: bytes, expires_at: float):
+        if digest not in self._revoked:
+            self.stats["revocations"] += 1
+        self._revoked[digest] = expires_at
+        self._entries.pop(digest, None)
+
+    async def record_revocation(self, db: AsyncSession, token: str, expires_at: Optional[float] = None):
+        """トークンを失効させ、他のワーカー・インスタンスにも伝わるようDBに記録（コミットまで行う）"""
+        expires_at = self.revoke(token, expires_at)
+        now = time.time()
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        await db.execute(
+            insert(RevokedAccessToken).values(
+                token_digest=token_digest(token).hex(), expires_at=expires_at, revoked_at=now
+            ).on_conflict_do_nothing(index_elements=[RevokedAccessToken.token_digest])
+        )
+        # exp を過ぎた失効は検証で弾かれるので保持しない
+        await db.execute(delete(RevokedAccessToken).where(RevokedAccessToken.expires_at <= now))
+        await db.commit()
+
+    async def sync_revocations(self, db: AsyncSession):
+        """前回から sync_seconds 以上経っていれば、他プロセスで記録された失効を取り込む
+
+        取り込みに失敗しても認証は止めない（次の間隔で再試行する）。
+        """
+        started = time.monotonic()
+        if self._synced_at is not None and started - self._synced_at < self.sync_seconds:
+            return
+        self._synced_at = started
+        table = RevokedAccessToken.__table__
+        try:
+            result = await db.execute(
+                select(table.c.token_digest, table.c.expires_at, table.c.revoked_at).where(
+                    table.c.revoked_at >= self._synced_through - self.CLOCK_SKEW_SECONDS,
+                    table.c.expires_at > time.time()
+                )
+            )
+            rows = result.all()
+        except Exception as e:
+            self.stats["sync_errors"] += 1
+            logger.warning(f"アクセストークンの失効の取り込みに失敗: {str(e)}")
+            await db.rollback()
+            return
+        for row in rows:
+            self._mark_revoked(bytes.fromhex(row.token_digest), row.expires_at)
+            self._synced_through = max(self._synced_through, row.revoked_at)
+        self.stats["syncs"] += 1
+
+    def _maybe_prune_revoked(self):
+        if self._revoked and time.monotonic() - self._pruned_at >= self.PRUNE_INTERVAL_SECONDS:
+            self._prune_revoked()
+
+    def _prune_revoked(self):
+        now = time.time()
+        for digest in [d for d, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[digest]
+        self._pruned_at = time.monotonic()
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """ヒット/ミスのカウンタと現在の件数"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "revoked": len(self._revoked),
+            "max_size": self.max_size,
+            "sync_seconds": self.sync_seconds,
+            "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+# TOKEN_CACHE_SIZE=0 でキャッシュを無効化
+token_cache = TokenCache(
+    max_size=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    sync_seconds=float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "5"))
+)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+認証処理のマイクロベンチマーク（トークン検証キャッシュの有無による1リクエストあたりのコスト比較）
+
+使い方: python bench_auth.py [反復回数]
+"""
+import sys
+import timeit
+from datetime import timedelta
+from app.utils.auth import create_access_token, verify_token, SECRET_KEY, ALGORITHM
+from app.utils.token_cache import token_cache
+from jose import jwt
+
+def report(label: str, seconds: float, number: int):
+    print(f"{label:<28} {seconds / number * 1_000_000:8.2f} µs/回")
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(minutes=30))
+
+    print(f"=== 認証オーバーヘッド（{number}回） ===")
+
+    # 変更前: 毎回デコードと HMAC 検証
+    before = timeit.timeit(lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), number=number)
+    report("jwt.decode（キャッシュなし）", before, number)
+
+    # 変更後: 初回のみ検証し、以降はキャッシュから返す
+    token_cache.clear()
+    verify_token(token)
+    after = timeit.timeit(lambda: verify_token(token), number=number)
+    report("verify_token（キャッシュあり）", after, number)
+
+    # 失効済みトークンの拒否
+    token_cache.revoke(token)
+    revoked = timeit.timeit(lambda: verify_token(token), number=number)
+    report("verify_token（失効済み）", revoked, number)
+
+    print(f"高速化: {before / after:.1f}倍")
+    print(token_cache.snapshot())
+
+if __name__ == "__main__":
+    main()
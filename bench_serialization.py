@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+一覧APIのシリアライズ処理のベンチマーク（ORM + pydantic検証 + 標準JSON と Core + orjson の比較）
+
+使い方: python bench_serialization.py [1ページの件数（既定100）] [反復回数（既定300）]
+DBの往復時間を除くため、インメモリのSQLiteに名刺データを作って計測する。
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from typing import List
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from app.models.models import BusinessCard
+from app.schemas.schemas import BusinessCard as BusinessCardSchema
+from app.routers.business_cards import BUSINESS_CARD_COLUMNS
+
+def setup(rows: int):
+    engine = create_engine("sqlite://")
+    BusinessCard.__table__.create(engine)
+    with Session(engine) as db:
+        db.add_all([
+            BusinessCard(
+                name=f"名前{i}", name_kana=f"ナマエ{i}", company=f"株式会社サンプル{i % 50}",
+                department="営業部", position="課長", memo="展示会で名刺交換" * 3,
+                updated_at=datetime(2024, 1, 1, 9, 0, i % 60)
+            )
+            for i in range(rows)
+        ])
+        db.commit()
+    return engine
+
+def before(db: Session, limit: int) -> bytes:
+    """変更前: ORMオブジェクト → response_model の検証 → jsonable_encoder → json.dumps（FastAPI既定の経路）"""
+    cards = db.execute(select(BusinessCard).order_by(BusinessCard.id).limit(limit)).scalars().all()
+    validated = TypeAdapter(List[BusinessCardSchema]).validate_python(cards, from_attributes=True)
+    content = jsonable_encoder(validated)
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    db.expunge_all()
+    return body
+
+def after(db: Session, limit: int) -> bytes:
+    """変更後: スキーマと同じ列だけをCoreで取得 → dict → orjson（ORJSONResponse の経路）"""
+    result = db.execute(select(*BUSINESS_CARD_COLUMNS).order_by(BusinessCard.id).limit(limit))
+    return orjson.dumps([dict(row._mapping) for row in result])
+
+def run(label: str, func, db: Session, limit: int, number: int) -> float:
+    func(db, limit)  # ウォームアップ
+    started = time.perf_counter()
+    for _ in range(number):
+        func(db, limit)
+    elapsed = time.perf_counter() - started
+    rows_per_second = limit * number / elapsed
+    print(f"{label:<36} {elapsed / number * 1000:8.2f} ms/ページ  {rows_per_second:>10,.0f} 行/秒")
+    return rows_per_second
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    engine = setup(limit)
+    with Session(engine) as db:
+        # 同じ内容を返すことを確認（キーの順序は問わない）
+        assert json.loads(before(db, limit)) == json.loads(after(db, limit)), "変更前後でレスポンスの内容が異なります"
+
+        print(f"=== 名刺一覧 {limit}件/ページ × {number}回 ===")
+        slow = run("ORM + pydantic + json（変更前）", before, db, limit, number)
+        fast = run("Core + orjson（変更後）", after, db, limit, number)
+        print(f"高速化: {fast / slow:.1f}倍")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+bcryptのコストを実行環境で計測し、目標のハッシュ時間に収まる最大のコストを選ぶスクリプト
+
+使い方: python calibrate_bcrypt.py [目標ミリ秒（既定250）] [各コストの試行回数（既定3）]
+結果の BCRYPT_ROUNDS を環境変数に設定すると、次回ログイン時に各ユーザーのハッシュが再計算される。
+"""
+import statistics
+import sys
+import time
+import bcrypt
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+
+def measure(rounds: int, samples: int) -> float:
+    """指定コストでのハッシュ時間の中央値（ミリ秒）"""
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def calibrate(target_ms: float, samples: int) -> int:
+    """目標時間以下で最大のコストを返す（コストが1上がるごとに時間は約2倍）"""
+    chosen = MIN_ROUNDS
+    print(f"{'コスト':>6} {'時間(ms)':>10}")
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure(rounds, samples)
+        print(f"{rounds:>6} {elapsed:>10.1f}")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+def main():
+    target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"=== bcryptコストの計測（目標 {target_ms:.0f}ms） ===")
+    rounds = calibrate(target_ms, samples)
+    print(f"\n推奨設定: BCRYPT_ROUNDS={rounds}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+名刺をCSV/XLSXファイルから一括取り込みするスクリプト
+
+使い方: python import_business_cards.py ファイル名 [チャンク行数（既定5000）]
+"""
+import asyncio
+import sys
+import time
+from app.database.connection import AsyncSessionLocal, async_engine
+from app.services.business_card_import import import_business_cards, ImportFormatError, IMPORT_CHUNK_SIZE
+
+async def main(path: str, chunk_size: int):
+    with open(path, "rb") as f:
+        data = f.read()
+    
+    started = time.perf_counter()
+    
+    def progress(report):
+        elapsed = time.perf_counter() - started
+        print(f"  {report.total_rows}行処理 / {report.imported}件登録 / 重複{report.duplicates}件 / エラー{report.failed}件 ({elapsed:.1f}秒)")
+    
+    print(f"=== 名刺の取り込み: {path} ===")
+    try:
+        async with AsyncSessionLocal() as db:
+            report = await import_business_cards(db, data, path, chunk_size, on_progress=progress)
+    except ImportFormatError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        await async_engine.dispose()
+    
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ {report.imported}件を登録しました（{elapsed:.1f}秒、{report.imported / elapsed if elapsed else 0:.0f}件/秒）")
+    for error in report.errors:
+        print(f"  {error.row}行目: {error.error}")
+    if report.failed > len(report.errors):
+        print(f"  ...ほか{report.failed - len(report.errors)}件")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_CHUNK_SIZE))
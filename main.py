@@ -1,16 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, contacts, business_cards, coworkers
-from app.database.connection import engine, Base
+from sqlalchemy import select, func
+from app.routers import auth, contacts, business_cards, coworkers, graphql
+from app.database.connection import async_engine, Base
 from app.routers.auth import router as auth_router
+from app.utils.password_pool import password_pool
+from app.services.last_login_buffer import last_login_buffer
+from app.services.suggest_index import business_card_index, coworker_index
 
-# データベーステーブルの作成
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # データベーステーブルの作成
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    last_login_buffer.start()
+    # 候補表示インデックスの定期的な読み直し（リクエスト中に全件を読まないようバックグラウンドで行う）
+    business_card_index.start()
+    coworker_index.start()
+    yield
+    await business_card_index.stop()
+    await coworker_index.stop()
+    # 溜まっている最終ログイン日時を書き込んでから終了
+    await last_login_buffer.stop()
+    password_pool.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="面談アプリ API",
     description="外部面談を管理するためのAPI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -20,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Has-More", "ETag", "Last-Modified"],
 )
 
 # ルーターの追加
@@ -27,6 +48,7 @@ app.include_router(auth.router, prefix="/api/auth", tags=["認証"])
 app.include_router(contacts.router, prefix="/api/contacts", tags=["面談記録"])
 app.include_router(business_cards.router, prefix="/api/business-cards", tags=["名刺"])
 app.include_router(coworkers.router, prefix="/api/coworkers", tags=["社内メンバー"])
+app.include_router(graphql.router, prefix="/graphql", tags=["GraphQL"])
 
 @app.get("/")
 async def root():
@@ -40,12 +62,12 @@ async def health_check():
 async def debug_db():
     """データベース接続のデバッグ"""
     try:
-        from app.database.connection import SessionLocal
+        from app.database.connection import AsyncSessionLocal
         from app.models.models import Coworker, AuthUser
         
-        with SessionLocal() as db:
-            coworker_count = db.query(Coworker).count()
-            auth_user_count = db.query(AuthUser).count()
+        async with AsyncSessionLocal() as db:
+            coworker_count = await db.scalar(select(func.count()).select_from(Coworker))
+            auth_user_count = await db.scalar(select(func.count()).select_from(AuthUser))
             
             return {
                 "status": "ok",
@@ -59,15 +81,66 @@ async def debug_db():
             "type": type(e).__name__
         }
 
+@app.get("/debug/summary-cache")
+async def debug_summary_cache():
+    """要約キャッシュのヒット/ミス統計"""
+    from app.services.summary_cache import summary_cache
+    
+    return summary_cache.snapshot()
+
+@app.get("/debug/principal-cache")
+async def debug_principal_cache():
+    """認証ユーザーキャッシュのヒット率"""
+    from app.utils.principal_cache import principal_cache
+    return principal_cache.snapshot()
+
+@app.get("/debug/token-cache")
+async def debug_token_cache():
+    """トークン検証キャッシュのヒット率"""
+    from app.utils.token_cache import token_cache
+    return token_cache.snapshot()
+
+@app.get("/debug/last-login-buffer")
+async def debug_last_login_buffer():
+    """最終ログイン日時の書き込みバッファの状態"""
+    return last_login_buffer.snapshot()
+
+@app.get("/debug/login-throttle")
+async def debug_login_throttle():
+    """ログイン試行制限の許可・拒否件数"""
+    from app.utils.login_throttle import login_throttle
+    return login_throttle.snapshot()
+
+@app.get("/debug/suggest-index")
+async def debug_suggest_index():
+    """候補表示用インデックスの件数と読み込み状況"""
+    from app.services.suggest_index import business_card_index, coworker_index
+    return {"business_cards": business_card_index.snapshot(), "coworkers": coworker_index.snapshot()}
+
+@app.get("/debug/coworker-directory")
+async def debug_coworker_directory():
+    """社内メンバー一覧スナップショットの世代と件数"""
+    from app.services.coworker_directory import coworker_directory
+    return coworker_directory.snapshot()
+
+@app.get("/debug/graphql-limits")
+async def debug_graphql_limits():
+    """GraphQLの深さ・複雑度の上限と拒否件数"""
+    from app.utils.graphql_limits import query_limits
+    return query_limits.snapshot()
+
+@app.get("/debug/password-pool")
+async def debug_password_pool():
+    """パスワードハッシュ用プールの待ち行列・処理時間"""
+    return password_pool.snapshot()
+
 @app.get("/debug/auth")
 async def debug_auth():
     """認証モジュールのデバッグ"""
     try:
-        from app.utils.auth import get_password_hash, verify_password
-        
         test_password = "password"
-        hashed = get_password_hash(test_password)
-        is_valid = verify_password(test_password, hashed)
+        hashed = await password_pool.hash(test_password)
+        is_valid = await password_pool.verify(test_password, hashed)
         
         return {
             "status": "ok",
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+面談記録の全文検索インデックスを再構築するスクリプト
+"""
+import asyncio
+from app.database.connection import AsyncSessionLocal, async_engine
+from app.services.search_service import rebuild_index
+
+async def rebuild_search_index():
+    """破棄済み以外の全面談記録を再インデックス"""
+    print("=== 検索インデックスの再構築 ===")
+    
+    async with AsyncSessionLocal() as db:
+        count = await rebuild_index(db)
+    await async_engine.dispose()
+    
+    print(f"✅ {count}件の面談記録をインデックスしました")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(rebuild_search_index())
+    except Exception as e:
+        print(f"エラー: {e}")
+        import traceback
+        traceback.print_exc()